@@ -1,21 +1,33 @@
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, Response, stream_with_context
 from flask_cors import CORS
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+import atexit
+import gzip
+import hashlib
+from flask_caching import Cache
 from apscheduler.schedulers.background import BackgroundScheduler
 import os
 import logging
+import threading
+import numpy as np
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 import time
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from functools import wraps
 import traceback
 
 # Import services
 from services.nepse_service import NepseService
-from services.merolagani_service import MerolaganiService
+from services.merolagani_service import get_merolagani_service
 
 # Import health check blueprint
 from health import health_bp
 
+from utils import json_dumps
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -32,21 +44,263 @@ app.register_blueprint(health_bp, url_prefix='/api')
 
 # Initialize services
 nepse_service = NepseService()
-merolagani_service = MerolaganiService()
-
-# Cache data
-cache = {
-    'stocks': {'data': None, 'last_updated': None},
-    'indices': {'data': None, 'last_updated': None},
-    'top_gainers': {'data': None, 'last_updated': None},
-    'top_losers': {'data': None, 'last_updated': None},
-    'sectors': {'data': None, 'last_updated': None},
-    'merolagani_latest': {'data': None, 'last_updated': None},
-}
+merolagani_service = get_merolagani_service()
 
 # Cache timeout in seconds (default: 5 minutes)
 CACHE_TIMEOUT = int(os.getenv('CACHE_TIMEOUT', 300))
 
+# Market depth cache timeout in seconds (order books go stale fast)
+MARKET_DEPTH_TIMEOUT = int(os.getenv('MARKET_DEPTH_TIMEOUT', 30))
+
+# Response timestamps only need second precision, so format datetime.now()
+# at most once per second instead of on every request.
+_now_strings: Tuple[int, str, str] = (0, '', '')
+
+def _refresh_now_strings() -> Tuple[int, str, str]:
+    global _now_strings
+    second = int(time.time())
+    if _now_strings[0] != second:
+        now = datetime.now()
+        _now_strings = (second, now.isoformat(), now.strftime('%Y-%m-%d %H:%M:%S'))
+    return _now_strings
+
+def now_iso() -> str:
+    """Current time as an ISO string, cached per second"""
+    return _refresh_now_strings()[1]
+
+def now_str() -> str:
+    """Current time as '%Y-%m-%d %H:%M:%S', cached per second"""
+    return _refresh_now_strings()[2]
+
+# Cache backend: Redis when REDIS_HOST is set, so all Gunicorn workers share
+# one copy of the data instead of each refreshing its own. Falls back to an
+# in-process SimpleCache for single-process development without Redis.
+cache_config = {
+    'CACHE_DEFAULT_TIMEOUT': CACHE_TIMEOUT,
+    'CACHE_KEY_PREFIX': 'nepse_',
+}
+if os.getenv('REDIS_HOST'):
+    cache_config.update({
+        'CACHE_TYPE': 'RedisCache',
+        'CACHE_REDIS_HOST': os.getenv('REDIS_HOST'),
+        'CACHE_REDIS_PORT': int(os.getenv('REDIS_PORT', 6379)),
+        'CACHE_REDIS_DB': int(os.getenv('REDIS_DB', 0)),
+    })
+else:
+    cache_config['CACHE_TYPE'] = 'SimpleCache'
+
+cache = Cache(app, config=cache_config)
+
+# Per-client rate limits so a scraper hammering the API can't starve real
+# clients or drive extra upstream fetches. Uses the same Redis instance as
+# the cache when available so limits are enforced across all workers.
+RATE_LIMIT_PER_MINUTE = int(os.getenv('RATE_LIMIT_PER_MINUTE', 60))
+RATE_LIMIT_PER_HOUR = int(os.getenv('RATE_LIMIT_PER_HOUR', 1000))
+
+if os.getenv('REDIS_HOST'):
+    _limiter_storage = (
+        f"redis://{os.getenv('REDIS_HOST')}:{int(os.getenv('REDIS_PORT', 6379))}"
+        f"/{int(os.getenv('REDIS_DB', 0))}"
+    )
+else:
+    _limiter_storage = 'memory://'
+
+limiter = Limiter(
+    key_func=get_remote_address,
+    app=app,
+    default_limits=[
+        f"{RATE_LIMIT_PER_MINUTE} per minute",
+        f"{RATE_LIMIT_PER_HOUR} per hour",
+    ],
+    storage_uri=_limiter_storage,
+    enabled=os.getenv('ENABLE_RATE_LIMITING', 'True').lower() == 'true',
+)
+
+# Load balancer probes shouldn't count against client limits
+limiter.exempt(health_bp)
+
+def get_cached(cache_key: str) -> Optional[Dict[str, Any]]:
+    """Get a cache entry, or None if missing or expired"""
+    return cache.get(cache_key)
+
+# Default item count for the top-gainers/top-losers endpoints
+DEFAULT_TOP_LIMIT = 10
+
+def fingerprint(payload: bytes) -> str:
+    """Short non-cryptographic fingerprint for ETags and cache keys.
+
+    BLAKE2b is the fastest hash in hashlib and 16 bytes is plenty for
+    change detection; nothing here needs collision resistance against an
+    adversary.
+    """
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+def _render_stocks_payload(entry: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'status': 'success',
+        'data': entry['data'],
+        'cached': True,
+        'last_updated': entry['last_updated'].isoformat(),
+        'count': len(entry['data'])
+    }
+
+def _render_market_payload(entry: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'success': True,
+        'data': entry['data'],
+        'cached': True,
+        'last_updated': entry['last_updated'].strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+# Cache-hit payload renderers per cache key. The rendered JSON is encoded
+# once at cache-write time so hits skip jsonify (and re-serializing a few
+# thousand stock dicts) on every request.
+RESPONSE_RENDERERS = {
+    'stocks': _render_stocks_payload,
+    'indices': _render_market_payload,
+    'top_gainers': _render_market_payload,
+    'top_losers': _render_market_payload,
+    'sectors': _render_market_payload,
+    'merolagani_latest': _render_market_payload,
+}
+
+def set_cached(cache_key: str, data: Any) -> Dict[str, Any]:
+    """Store data in the shared cache along with its update time"""
+    # The top endpoints never serve more than the default limit, so trim once
+    # here instead of slicing (and caching the excess) on every request
+    if cache_key in ('top_gainers', 'top_losers'):
+        data = data[:DEFAULT_TOP_LIMIT]
+
+    entry = {'data': data, 'last_updated': datetime.now()}
+    cache.set(cache_key, entry, timeout=CACHE_TIMEOUT)
+
+    # Index the stocks list by symbol so per-symbol lookups are dict hits
+    # against one shared snapshot rather than upstream calls per symbol
+    if cache_key == 'stocks':
+        index = {s.get('symbol'): s for s in data if s.get('symbol')}
+        cache.set('stock_index', index, timeout=CACHE_TIMEOUT)
+
+    renderer = RESPONSE_RENDERERS.get(cache_key)
+    if renderer:
+        body = json_dumps(renderer(entry))
+        cache.set(f'body:{cache_key}', body, timeout=CACHE_TIMEOUT)
+        cache.set(f'etag:{cache_key}', fingerprint(body), timeout=CACHE_TIMEOUT)
+        # Compress once per refresh instead of per response; JSON this
+        # repetitive shrinks ~10x, so skip only trivially small bodies
+        if len(body) >= MIN_COMPRESS_SIZE:
+            cache.set(f'gz:{cache_key}', gzip.compress(body, compresslevel=6), timeout=CACHE_TIMEOUT)
+
+    return entry
+
+# Bodies above this size are streamed to the client in chunks instead of
+# being handed to the WSGI server as one large write
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Bodies below this size aren't worth gzipping
+MIN_COMPRESS_SIZE = 1024
+
+def _iter_body_chunks(body: bytes):
+    view = memoryview(body)
+    for start in range(0, len(view), STREAM_CHUNK_SIZE):
+        yield bytes(view[start:start + STREAM_CHUNK_SIZE])
+
+def _body_response(body: bytes) -> Response:
+    """Build a JSON response from pre-encoded bytes, streaming large ones"""
+    if len(body) <= STREAM_CHUNK_SIZE:
+        return Response(body, mimetype='application/json')
+
+    response = Response(
+        stream_with_context(_iter_body_chunks(body)),
+        mimetype='application/json'
+    )
+    response.headers['Content-Length'] = str(len(body))
+    return response
+
+def cached_response(cache_key: str) -> Optional[Response]:
+    """Return the pre-encoded JSON response for a cache hit, if present.
+
+    Sends ETag/Cache-Control headers and answers If-None-Match revalidations
+    with an empty 304 so unchanged payloads cost no response bandwidth.
+    """
+    body = cache.get(f'body:{cache_key}')
+    if body is None:
+        return None
+
+    etag = cache.get(f'etag:{cache_key}')
+    if etag and request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = None
+        if 'gzip' in request.headers.get('Accept-Encoding', ''):
+            gz_body = cache.get(f'gz:{cache_key}')
+            if gz_body is not None:
+                response = Response(gz_body, mimetype='application/json')
+                response.headers['Content-Encoding'] = 'gzip'
+        if response is None:
+            response = _body_response(body)
+
+    if etag:
+        response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = CACHE_TIMEOUT
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+# One lock per cache key: when several requests miss the same key at once,
+# only the first performs the upstream fetch and the others reuse its result.
+_fetch_locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+
+def fetch_cached(cache_key: str, fetch_function) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """Get a cache entry, fetching and storing it at most once on a miss.
+
+    Returns (entry, from_cache); entry is None when the fetch produced no
+    data.
+    """
+    entry = get_cached(cache_key)
+    if entry:
+        return entry, True
+
+    with _fetch_locks[cache_key]:
+        # Another request may have completed the fetch while we waited
+        entry = get_cached(cache_key)
+        if entry:
+            return entry, True
+
+        data = fetch_function()
+        if not data:
+            return None, False
+        return set_cached(cache_key, data), False
+
+def cached_market_route(cache_key: str, fetch_function, limit: Optional[int] = None):
+    """Serve a 'success'-style endpoint backed by the shared cache.
+
+    Handles the pre-encoded fast path, the single-flight miss fetch, and the
+    common error response in one place, so the routes don't each repeat the
+    same try/except/cache-write block.
+    """
+    if limit is None or limit >= DEFAULT_TOP_LIMIT:
+        response = cached_response(cache_key)
+        if response:
+            return response
+
+    try:
+        entry, from_cache = fetch_cached(cache_key, fetch_function)
+        data = entry['data'] if entry else ([] if limit is not None else None)
+        if limit is not None and entry:
+            data = data[:limit]
+        return jsonify({
+            'success': True,
+            'data': data,
+            'cached': from_cache,
+            'last_updated': entry['last_updated'].strftime('%Y-%m-%d %H:%M:%S') if entry else now_str()
+        })
+    except Exception as e:
+        logger.error(f"Error fetching {cache_key}: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 def api_error_handler(f):
     """Decorator to handle API errors consistently"""
     @wraps(f)
@@ -58,7 +312,7 @@ def api_error_handler(f):
             return jsonify({
                 'status': 'error',
                 'message': str(e),
-                'timestamp': datetime.now().isoformat()
+                'timestamp': now_iso()
             }), 500
     return decorated
 
@@ -78,20 +332,34 @@ def validate_params(*required_params):
                 return jsonify({
                     'status': 'error',
                     'message': f'Missing required parameters: {", ".join(missing_params)}',
-                    'timestamp': datetime.now().isoformat()
+                    'timestamp': now_iso()
                 }), 400
                 
             return f(*args, **kwargs)
         return decorated
     return decorator
 
-def is_cache_valid(cache_key: str) -> bool:
-    """Check if cache is valid"""
-    if cache_key not in cache or cache[cache_key]['data'] is None or cache[cache_key]['last_updated'] is None:
-        return False
-    
-    elapsed = datetime.now() - cache[cache_key]['last_updated']
-    return elapsed.total_seconds() < CACHE_TIMEOUT
+def derive_top_movers(stocks: List[Dict[str, Any]], limit: int = DEFAULT_TOP_LIMIT) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Derive top gainers and losers from the stocks list in one pass.
+
+    Builds a numpy column of changePercent and uses argpartition for O(n)
+    selection of both ends, instead of sorting the full list twice in
+    Python.
+    """
+    if not stocks:
+        return [], []
+
+    changes = np.array([s.get('changePercent', 0) or 0 for s in stocks], dtype=np.float64)
+    k = min(limit, len(changes))
+
+    gainer_idx = np.argpartition(-changes, k - 1)[:k]
+    gainer_idx = gainer_idx[np.argsort(-changes[gainer_idx])]
+    loser_idx = np.argpartition(changes, k - 1)[:k]
+    loser_idx = loser_idx[np.argsort(changes[loser_idx])]
+
+    gainers = [stocks[i] for i in gainer_idx]
+    losers = [stocks[i] for i in loser_idx]
+    return gainers, losers
 
 def update_cache() -> None:
     """Update cache data in background with improved error handling"""
@@ -106,62 +374,90 @@ def update_cache() -> None:
         ('merolagani_latest', lambda: merolagani_service.get_latest_market_data()),
     ]
     
-    for cache_key, fetch_function in cache_operations:
-        try:
-            data = fetch_function()
-            if data:
-                cache[cache_key]['data'] = data
-                cache[cache_key]['last_updated'] = datetime.now()
-                data_count = len(data) if isinstance(data, list) else 1
-                logger.info(f"Updated {cache_key} cache with {data_count} items")
-            else:
-                logger.warning(f"No data received for {cache_key}")
-        except Exception as e:
-            logger.error(f"Failed to update {cache_key} cache: {str(e)}")
-            # Don't break the entire cache update process for one failure
-            continue
-    
+    # The fetches are network-bound and independent, so run them concurrently:
+    # refresh time drops from the sum of the round-trips to the slowest one.
+    results: Dict[str, Any] = {}
+    with ThreadPoolExecutor(max_workers=len(cache_operations)) as executor:
+        futures = {
+            executor.submit(fetch_function): cache_key
+            for cache_key, fetch_function in cache_operations
+        }
+
+        for future in as_completed(futures):
+            cache_key = futures[future]
+            try:
+                data = future.result()
+                if data:
+                    set_cached(cache_key, data)
+                    results[cache_key] = data
+                    data_count = len(data) if isinstance(data, list) else 1
+                    logger.info(f"Updated {cache_key} cache with {data_count} items")
+                else:
+                    logger.warning(f"No data received for {cache_key}")
+            except Exception as e:
+                # Don't break the entire cache update process for one failure
+                logger.error(f"Failed to update {cache_key} cache: {str(e)}")
+
+    # If the dedicated top-ten feeds failed but stocks came through, derive
+    # the movers from the stocks column instead of leaving those keys stale
+    if results.get('stocks') and not (results.get('top_gainers') and results.get('top_losers')):
+        gainers, losers = derive_top_movers(results['stocks'])
+        if gainers and not results.get('top_gainers'):
+            set_cached('top_gainers', gainers)
+            logger.info("Derived top_gainers from stocks cache")
+        if losers and not results.get('top_losers'):
+            set_cached('top_losers', losers)
+            logger.info("Derived top_losers from stocks cache")
+
     logger.info("Cache update process completed")
 
+def should_start_scheduler() -> bool:
+    """Decide whether this process should own the cache refresh scheduler.
+
+    Under Gunicorn every worker imports this module; without a gate the
+    interval job fires in all of them, multiplying upstream fetches by the
+    worker count. Only the process started with RUN_SCHEDULER=1 (see run.py)
+    runs the scheduler. Under the Werkzeug reloader the app is also imported
+    in the monitor process, so in debug mode only the serving child (which
+    sets WERKZEUG_RUN_MAIN) qualifies.
+    """
+    if os.getenv('RUN_SCHEDULER', '1') != '1':
+        return False
+    if os.getenv('DEBUG', 'False').lower() in ('true', '1', 't'):
+        return os.getenv('WERKZEUG_RUN_MAIN') == 'true'
+    return True
+
 # Initialize scheduler
 scheduler = BackgroundScheduler()
 scheduler.add_job(update_cache, 'interval', minutes=5)
-scheduler.start()
 
-# Update cache on startup
-update_cache()
+if should_start_scheduler():
+    scheduler.start()
+    # Update cache on startup
+    update_cache()
 
 @app.route('/api/stocks', methods=['GET'])
 @api_error_handler
 def get_stocks():
     """Get all stocks data with improved caching and error handling"""
-    if is_cache_valid('stocks'):
-        return jsonify({
-            'status': 'success',
-            'data': cache['stocks']['data'],
-            'cached': True,
-            'last_updated': cache['stocks']['last_updated'].isoformat(),
-            'count': len(cache['stocks']['data'])
-        })
-    
-    # Fetch fresh data if cache is invalid
-    stocks = nepse_service.get_all_stocks()
-    if not stocks:
+    response = cached_response('stocks')
+    if response:
+        return response
+
+    entry, from_cache = fetch_cached('stocks', nepse_service.get_all_stocks)
+    if not entry:
         return jsonify({
             'status': 'error',
             'message': 'No stocks data available',
-            'timestamp': datetime.now().isoformat()
+            'timestamp': now_iso()
         }), 404
-    
-    cache['stocks']['data'] = stocks
-    cache['stocks']['last_updated'] = datetime.now()
-    
+
     return jsonify({
         'status': 'success',
-        'data': stocks,
-        'cached': False,
-        'last_updated': cache['stocks']['last_updated'].isoformat(),
-        'count': len(stocks)
+        'data': entry['data'],
+        'cached': from_cache,
+        'last_updated': entry['last_updated'].isoformat(),
+        'count': len(entry['data'])
     })
 
 @app.route('/api/stock/<symbol>', methods=['GET'])
@@ -172,156 +468,72 @@ def get_stock(symbol: str):
         return jsonify({
             'status': 'error',
             'message': 'Stock symbol is required',
-            'timestamp': datetime.now().isoformat()
+            'timestamp': now_iso()
         }), 400
     
     symbol = symbol.upper().strip()
-    stock = nepse_service.get_stock_by_symbol(symbol)
-    
+
+    # Concurrent lookups for different symbols all resolve against the shared
+    # stocks snapshot, so a burst of N symbol requests costs at most one
+    # all-stocks fetch (single-flight) instead of N upstream calls
+    index = cache.get('stock_index')
+    if index is None:
+        entry, _ = fetch_cached('stocks', nepse_service.get_all_stocks)
+        index = cache.get('stock_index') or {}
+
+    stock = index.get(symbol)
+    if not stock:
+        # Not in the snapshot (new listing or snapshot unavailable): fall
+        # back to the per-symbol upstream endpoint
+        stock = nepse_service.get_stock(symbol)
+
     if not stock:
         return jsonify({
             'status': 'error',
             'message': f'Stock {symbol} not found',
-            'timestamp': datetime.now().isoformat()
+            'timestamp': now_iso()
         }), 404
     
     return jsonify({
         'status': 'success',
         'data': stock,
-        'timestamp': datetime.now().isoformat()
+        'timestamp': now_iso()
     })
 
 @app.route('/api/indices', methods=['GET'])
 def get_indices():
     """Get market indices"""
-    if is_cache_valid('indices'):
-        return jsonify({
-            'success': True,
-            'data': cache['indices']['data'],
-            'cached': True,
-            'last_updated': cache['indices']['last_updated'].strftime('%Y-%m-%d %H:%M:%S')
-        })
-    
-    try:
-        indices = nepse_service.get_indices()
-        if indices:
-            cache['indices']['data'] = indices
-            cache['indices']['last_updated'] = datetime.now()
-        
-        return jsonify({
-            'success': True,
-            'data': indices,
-            'cached': False,
-            'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        })
-    except Exception as e:
-        logger.error(f"Error fetching indices: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+    return cached_market_route('indices', nepse_service.get_indices)
 
 @app.route('/api/top-gainers', methods=['GET'])
 def get_top_gainers():
     """Get top gainers"""
     limit = request.args.get('limit', default=10, type=int)
-    
-    if is_cache_valid('top_gainers'):
-        return jsonify({
-            'success': True,
-            'data': cache['top_gainers']['data'][:limit],
-            'cached': True,
-            'last_updated': cache['top_gainers']['last_updated'].strftime('%Y-%m-%d %H:%M:%S')
-        })
-    
-    try:
-        top_gainers = nepse_service.get_top_gainers(limit)
-        if top_gainers:
-            cache['top_gainers']['data'] = top_gainers
-            cache['top_gainers']['last_updated'] = datetime.now()
-        
-        return jsonify({
-            'success': True,
-            'data': top_gainers[:limit],
-            'cached': False,
-            'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        })
-    except Exception as e:
-        logger.error(f"Error fetching top gainers: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+    return cached_market_route('top_gainers', lambda: nepse_service.get_top_gainers(limit), limit=limit)
 
 @app.route('/api/top-losers', methods=['GET'])
 def get_top_losers():
     """Get top losers"""
     limit = request.args.get('limit', default=10, type=int)
-    
-    if is_cache_valid('top_losers'):
-        return jsonify({
-            'success': True,
-            'data': cache['top_losers']['data'][:limit],
-            'cached': True,
-            'last_updated': cache['top_losers']['last_updated'].strftime('%Y-%m-%d %H:%M:%S')
-        })
-    
-    try:
-        top_losers = nepse_service.get_top_losers(limit)
-        if top_losers:
-            cache['top_losers']['data'] = top_losers
-            cache['top_losers']['last_updated'] = datetime.now()
-        
-        return jsonify({
-            'success': True,
-            'data': top_losers[:limit],
-            'cached': False,
-            'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        })
-    except Exception as e:
-        logger.error(f"Error fetching top losers: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+    return cached_market_route('top_losers', lambda: nepse_service.get_top_losers(limit), limit=limit)
 
 @app.route('/api/sectors', methods=['GET'])
 def get_sectors():
     """Get sector data"""
-    if is_cache_valid('sectors'):
-        return jsonify({
-            'success': True,
-            'data': cache['sectors']['data'],
-            'cached': True,
-            'last_updated': cache['sectors']['last_updated'].strftime('%Y-%m-%d %H:%M:%S')
-        })
-    
-    try:
-        sectors = nepse_service.get_sector_data()
-        if sectors:
-            cache['sectors']['data'] = sectors
-            cache['sectors']['last_updated'] = datetime.now()
-        
-        return jsonify({
-            'success': True,
-            'data': sectors,
-            'cached': False,
-            'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        })
-    except Exception as e:
-        logger.error(f"Error fetching sectors: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+    return cached_market_route('sectors', nepse_service.get_sector_data)
 
 @app.route('/api/historical/<symbol>', methods=['GET'])
 def get_historical(symbol):
     """Get historical data for a stock"""
     days = request.args.get('days', default=365, type=int)
-    
+    cache_key = f'historical:{symbol.upper()}:{days}'
+
     try:
-        historical = nepse_service.get_historical_data(symbol, days)
+        historical = cache.get(cache_key)
+        if historical is None:
+            historical = nepse_service.get_historical_data(symbol, days)
+            if historical:
+                cache.set(cache_key, historical, timeout=CACHE_TIMEOUT)
         return jsonify({
             'success': True,
             'data': historical
@@ -336,8 +548,16 @@ def get_historical(symbol):
 @app.route('/api/market-depth/<symbol>', methods=['GET'])
 def get_market_depth(symbol):
     """Get market depth for a stock"""
+    cache_key = f'market_depth:{symbol.upper()}'
+
     try:
-        market_depth = nepse_service.get_market_depth(symbol)
+        market_depth = cache.get(cache_key)
+        if market_depth is None:
+            market_depth = nepse_service.get_market_depth(symbol)
+            if market_depth:
+                # Order books move quickly; keep this much shorter than the
+                # general CACHE_TIMEOUT
+                cache.set(cache_key, market_depth, timeout=MARKET_DEPTH_TIMEOUT)
         return jsonify({
             'success': True,
             'data': market_depth
@@ -387,32 +607,7 @@ def get_market_status():
 @app.route('/api/merolagani/latest', methods=['GET'])
 def get_merolagani_latest():
     """Get latest market data from MeroLagani"""
-    if is_cache_valid('merolagani_latest'):
-        return jsonify({
-            'success': True,
-            'data': cache['merolagani_latest']['data'],
-            'cached': True,
-            'last_updated': cache['merolagani_latest']['last_updated'].strftime('%Y-%m-%d %H:%M:%S')
-        })
-    
-    try:
-        data = merolagani_service.get_latest_market_data()
-        if data:
-            cache['merolagani_latest']['data'] = data
-            cache['merolagani_latest']['last_updated'] = datetime.now()
-        
-        return jsonify({
-            'success': True,
-            'data': data,
-            'cached': False,
-            'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        })
-    except Exception as e:
-        logger.error(f"Error fetching MeroLagani data: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+    return cached_market_route('merolagani_latest', merolagani_service.get_latest_market_data)
 
 @app.route('/api/merolagani/company/<symbol>', methods=['GET'])
 def get_merolagani_company(symbol):
@@ -448,17 +643,18 @@ def get_merolagani_news():
             'error': str(e)
         }), 500
 
-# Shutdown hook to stop scheduler
 @app.before_first_request
 def init_app():
     """Initialize app"""
     logger.info("Nepal Stock Market API started")
 
-@app.teardown_appcontext
-def shutdown(exception=None):
-    """Shutdown hook"""
+# teardown_appcontext fires after every request, not at process exit, so the
+# scheduler shutdown belongs in an atexit hook instead
+@atexit.register
+def shutdown():
+    """Stop the scheduler when the process exits"""
     if scheduler.running:
-        scheduler.shutdown()
+        scheduler.shutdown(wait=False)
         logger.info("Scheduler shutdown")
 
 if __name__ == '__main__':
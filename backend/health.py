@@ -9,20 +9,38 @@ from utils import get_nepal_time
 
 health_bp = Blueprint('health', __name__)
 
+# How long a system stats sample stays fresh, in seconds
+SYSTEM_INFO_TTL = 5.0
+
+_system_info = {'sampled_at': 0.0, 'info': None}
+
+def get_system_info():
+    """Get system stats, sampled at most every SYSTEM_INFO_TTL seconds.
+
+    The psutil calls (cpu_percent, virtual_memory, disk_usage) hit /proc and
+    the filesystem on every call; health checks from load balancers arrive
+    often enough that per-call sampling is wasted work.
+    """
+    now = time.monotonic()
+    if _system_info['info'] is None or now - _system_info['sampled_at'] > SYSTEM_INFO_TTL:
+        _system_info['info'] = {
+            'os': platform.system(),
+            'python_version': platform.python_version(),
+            'cpu_usage': psutil.cpu_percent(interval=None),
+            'memory_usage': psutil.virtual_memory().percent,
+            'disk_usage': psutil.disk_usage('/').percent,
+        }
+        _system_info['sampled_at'] = now
+    return _system_info['info']
+
 @health_bp.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint for the API"""
     start_time = time.time()
-    
+
     # Get system info
-    system_info = {
-        'os': platform.system(),
-        'python_version': platform.python_version(),
-        'cpu_usage': psutil.cpu_percent(),
-        'memory_usage': psutil.virtual_memory().percent,
-        'disk_usage': psutil.disk_usage('/').percent,
-    }
-    
+    system_info = get_system_info()
+
     # Get environment info
     env_info = {
         'debug': os.getenv('DEBUG', 'False'),
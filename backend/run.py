@@ -1,7 +1,9 @@
 #!/usr/bin/env python
 
 import os
+import subprocess
 import sys
+import time
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -20,19 +22,65 @@ def run_development_server():
     
     app.run(host='0.0.0.0', port=port, debug=debug)
 
+def run_scheduler_process():
+    """Run only the cache refresh scheduler (no web server)"""
+    os.environ['RUN_SCHEDULER'] = '1'
+
+    # Importing the app starts the scheduler via the RUN_SCHEDULER gate
+    from app import scheduler  # noqa: F401
+
+    print("Cache refresh scheduler running. Press CTRL+C to stop.")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        pass
+
 def run_production_server():
     """Run the production server using Gunicorn"""
     port = int(os.getenv('PORT', 5000))
     workers = int(os.getenv('GUNICORN_WORKERS', 4))
-    
+    threads = int(os.getenv('GUNICORN_THREADS', 8))
+
     print(f"Starting Nepal Stock Market API with Gunicorn on port {port}")
-    print(f"Workers: {workers}")
-    
-    os.system(f"gunicorn --bind 0.0.0.0:{port} --workers {workers} app:app")
+    print(f"Workers: {workers}, threads per worker: {threads}")
+
+    # One dedicated process owns the refresh scheduler; the web workers get
+    # RUN_SCHEDULER=0 so the interval job doesn't fire in every worker.
+    # The refresh only helps with the shared Redis cache backend: under the
+    # per-process SimpleCache fallback it would warm a private cache no
+    # worker can read while hammering the upstream sites for nothing.
+    scheduler_process = None
+    if os.getenv('REDIS_HOST'):
+        scheduler_process = subprocess.Popen([sys.executable, __file__, 'scheduler'])
+    else:
+        print("REDIS_HOST not set; skipping the background cache refresh "
+              "(workers will fetch on demand)")
+
+    env = os.environ.copy()
+    env['RUN_SCHEDULER'] = '0'
+
+    try:
+        # gthread workers let cache misses that block on upstream HTTP
+        # overlap instead of tying up a whole worker per request.
+        # --preload imports the app once in the master so workers share the
+        # loaded modules copy-on-write instead of importing 4 copies; the
+        # RUN_SCHEDULER=0 gate keeps the import side-effect free here.
+        subprocess.call(
+            f"gunicorn --bind 0.0.0.0:{port} --workers {workers} "
+            f"--worker-class gthread --threads {threads} --preload app:app",
+            shell=True,
+            env=env
+        )
+    finally:
+        if scheduler_process:
+            scheduler_process.terminate()
 
 if __name__ == '__main__':
     # Check if we should run in production mode
     if len(sys.argv) > 1 and sys.argv[1] == 'prod':
         run_production_server()
+    elif len(sys.argv) > 1 and sys.argv[1] == 'scheduler':
+        run_scheduler_process()
     else:
         run_development_server()
\ No newline at end of file
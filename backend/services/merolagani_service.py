@@ -1,447 +1,653 @@
+import asyncio
+import logging
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 import json
-from datetime import datetime
-from bs4 import BeautifulSoup
-import pandas as pd
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from bs4 import BeautifulSoup, SoupStrainer
+import lxml.html
+from lxml import etree
+
+try:
+    # selectolax parses HTML several times faster than BeautifulSoup; the
+    # BeautifulSoup extractors remain as the fallback
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    # httpx multiplexes many page fetches over a few HTTP/2 connections
+    import httpx
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+# Shared session: keep-alive connections to merolagani.com are reused across
+# calls instead of paying a new TCP/TLS handshake per page
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+# How long a scraped page stays fresh, in seconds. The site updates every
+# minute or so during trading; refetching more often is wasted round-trips.
+PAGE_CACHE_TTL = 60
+
+# The latest-market extractors only ever look inside tables and divs, so
+# strain the fallback parse to those elements in a single pass instead of
+# building BeautifulSoup nodes for the page's scripts, head and navigation
+_LATEST_MARKET_STRAINER = SoupStrainer(['table', 'div'])
+
+# Strips everything except digits, decimal point and minus sign
+_NON_NUMERIC_RE = re.compile(r'[^0-9.\-]+')
+
+# Nepal timezone (UTC+5:45), built once instead of per call
+NEPAL_TZ = timezone(timedelta(hours=5, minutes=45))
+
+# Table-based sections of latestmarket.aspx:
+# (output key, table id, minimum columns, row-parser method name)
+_TABLE_SECTIONS = (
+    ('sector_summary', 'sector-turnover', 3, '_sector_row'),
+    ('top_gainers', 'top-gainers', 4, '_mover_row'),
+    ('top_losers', 'top-losers', 4, '_mover_row'),
+    ('top_turnover', 'top-turnover', 2, '_turnover_row'),
+    ('top_volume', 'top-volume', 2, '_volume_row'),
+)
+
+# One linear C-level scan of the raw bytes tells which section tables the
+# page carries before any tree is built; the fast-path parse is skipped
+# when tables are missing (it could only fail). Purely an optimization
+# gate: the BeautifulSoup fallback still looks every table up, so a miss
+# here (e.g. an unquoted id attribute) costs speed, never data.
+_SECTION_ID_RE = re.compile(
+    b'id=["\'](' + b'|'.join(spec[1].encode() for spec in _TABLE_SECTIONS) + b')["\']'
+)
+
+# Precompiled selectors: building a CSS selector string or re-parsing an
+# XPath expression on every call is pure overhead, so both are done once
+# at import time. The table lookup takes the id as an XPath variable.
+_CSS_TABLE_SELECTORS = {spec[1]: f'table#{spec[1]}' for spec in _TABLE_SECTIONS}
+_CSS_SUMMARY_DIV = 'div.market-summary'
+_CSS_SUMMARY_ITEM = 'div.summary-item'
+_CSS_ITEM_NAME = 'div.name'
+_CSS_ITEM_VALUE = 'div.value'
+_XP_TABLE_BY_ID = etree.XPath('//table[@id=$table_id]')
+# (.//tr)[...] numbers the rows in document order; a bare .//tr[...]
+# would count per parent and drop the first tbody row on tables that
+# wrap their header in an explicit thead
+_XP_DATA_CELLS = etree.XPath('(.//tr)[position()>1]/td')
+_XP_FIRST_DATA_ROW_CELLS = etree.XPath('(.//tr)[2]/td')
+_XP_ROWS = etree.XPath('.//tr')
+_XP_ROW_CELLS = etree.XPath('.//td')
+_XP_SUMMARY_ITEMS = etree.XPath(
+    '//div[contains(@class, "market-summary")]'
+    '//div[contains(@class, "summary-item")]'
+)
+_XP_ITEM_NAMES = etree.XPath('.//div[contains(@class, "name")]')
+_XP_ITEM_VALUES = etree.XPath('.//div[contains(@class, "value")]')
 
 class MerolaganiService:
     def __init__(self):
         self.base_url = 'https://merolagani.com'
+        self.session = _session
+        self._page_cache = {}
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            # Table-heavy market pages compress 5-10x; urllib3 decodes
+            # gzip/deflate (and brotli, via the brotli package) in C
+            'Accept-Encoding': 'gzip, deflate, br',
             'Accept-Language': 'en-US,en;q=0.9',
         }
     
     def get_current_time(self):
         """Get current time in Nepal timezone (UTC+5:45)"""
-        utc_now = datetime.utcnow()
-        nepal_offset = timedelta(hours=5, minutes=45)
-        nepal_time = utc_now + nepal_offset
-        return nepal_time.strftime('%Y-%m-%d %H:%M:%S')
+        return datetime.now(NEPAL_TZ).strftime('%Y-%m-%d %H:%M:%S')
     
-    def get_latest_market_data(self):
-        """Get latest market data from Merolagani"""
+    def _get_page(self, path):
+        """Fetch a page, serving repeats within PAGE_CACHE_TTL from memory.
+
+        Returns the raw bytes: the parsers (lxml, selectolax, BeautifulSoup)
+        all detect the encoding themselves in C, so decoding to str here
+        would be a wasted pass over the document.
+
+        Once the TTL lapses, the stored ETag/Last-Modified validators are
+        sent as a conditional GET; a 304 answer reuses the cached copy
+        without re-downloading the page.
+        """
+        now = time.monotonic()
+        cached = self._page_cache.get(path)
+        if cached and now - cached[0] < PAGE_CACHE_TTL:
+            return cached[1]
+
+        headers = self.headers
+        if cached and (cached[2] or cached[3]):
+            headers = dict(self.headers)
+            if cached[2]:
+                headers['If-None-Match'] = cached[2]
+            if cached[3]:
+                headers['If-Modified-Since'] = cached[3]
+
+        response = self.session.get(f"{self.base_url}{path}", headers=headers, stream=True)
+
+        if response.status_code == 304 and cached:
+            # Unchanged upstream: keep the cached copy, just restart the TTL
+            self._page_cache[path] = (now, cached[1], cached[2], cached[3])
+            return cached[1]
+
+        if not response.ok:
+            # Never cache an error page: serve the stale copy if there is
+            # one (without re-stamping, so the next call retries upstream),
+            # otherwise raise into the caller's guard
+            response.close()
+            if cached:
+                return cached[1]
+            response.raise_for_status()
+
+        # Read the body in fixed-size chunks; iter_content decompresses in C
+        # as it goes instead of requests buffering the socket and then
+        # copying the whole payload once more for .content
+        buf = bytearray()
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            buf.extend(chunk)
+        html = bytes(buf)
+
+        self._page_cache[path] = (
+            now,
+            html,
+            response.headers.get('ETag'),
+            response.headers.get('Last-Modified'),
+        )
+        return html
+
+    def get_latest_market_data(self, limit=None):
+        """Get latest market data from Merolagani.
+
+        limit optionally caps the rows kept per section; find_all can
+        then stop its traversal early instead of materialising every row
+        of a table when the caller only wants the top N.
+        """
         try:
             # Fetch the latest market page
-            response = requests.get(f"{self.base_url}/latestmarket.aspx", headers=self.headers)
-            soup = BeautifulSoup(response.text, 'lxml')
-            
-            # Extract data
+            html = self._get_page('/latestmarket.aspx')
+
+            # Pre-scan the raw bytes for the section table ids so absent
+            # sections can short-circuit without a tree traversal
+            present = {m.group(1).decode() for m in _SECTION_ID_RE.finditer(html)}
+
+            # Fast path: extract straight from a selectolax (preferred) or
+            # plain lxml tree; only worth attempting when every expected
+            # table is on the page, since the fast paths handle nothing else
+            if len(present) == len(_TABLE_SECTIONS):
+                if HTMLParser is not None:
+                    market_data = self._extract_with_selectolax(html, limit)
+                else:
+                    market_data = self._extract_with_lxml(html, limit)
+                if market_data is not None:
+                    return market_data
+
+            soup = BeautifulSoup(html, 'lxml', parse_only=_LATEST_MARKET_STRAINER)
+
+            # Extract data, one section spec at a time
             market_data = {
-                'sector_summary': self._extract_sector_summary(soup),
-                'top_gainers': self._extract_top_gainers(soup),
-                'top_losers': self._extract_top_losers(soup),
-                'top_turnover': self._extract_top_turnover(soup),
-                'top_volume': self._extract_top_volume(soup),
-                'market_summary': self._extract_market_summary(soup)
+                key: self._extract_table_section(
+                    soup, key, table_id, min_cols, parser_name, limit=limit
+                )
+                for key, table_id, min_cols, parser_name in _TABLE_SECTIONS
             }
+            market_data['market_summary'] = self._extract_market_summary(soup)
             
             return market_data
-        except Exception as e:
-            print(f"Error fetching data from Merolagani: {str(e)}")
+        except Exception:
+            logger.exception("Error fetching data from Merolagani")
             return {}
     
     def get_company_details(self, symbol):
         """Get detailed company information"""
         try:
             # Fetch the company page
-            response = requests.get(f"{self.base_url}/company/{symbol}", headers=self.headers)
-            soup = BeautifulSoup(response.text, 'lxml')
+            soup = BeautifulSoup(self._get_page(f"/company/{symbol}"), 'lxml')
             
             # Extract company details
             company_data = self._extract_company_details(soup, symbol)
             
             return company_data
-        except Exception as e:
-            print(f"Error fetching company details for {symbol}: {str(e)}")
+        except Exception:
+            logger.exception("Error fetching company details for %s", symbol)
             return {}
     
+    def get_companies_details(self, symbols):
+        """Fetch company pages for many symbols concurrently.
+
+        With httpx installed the fetches are multiplexed over a shared
+        AsyncClient (HTTP/2 when the h2 extra is present), so N company
+        pages cost roughly one round-trip instead of N. Without httpx the
+        symbols fan out over a thread pool of get_company_details calls.
+        Returns a dict of symbol -> company details.
+        """
+        symbols = list(symbols)
+        if not symbols:
+            return {}
+
+        if httpx is None:
+            with ThreadPoolExecutor(max_workers=min(8, len(symbols))) as executor:
+                return dict(zip(symbols, executor.map(self.get_company_details, symbols)))
+
+        async def fetch_all():
+            try:
+                client = httpx.AsyncClient(
+                    http2=True, base_url=self.base_url, headers=self.headers, timeout=15
+                )
+            except ImportError:
+                # h2 extra not installed; plain HTTP/1.1 still shares the pool
+                client = httpx.AsyncClient(
+                    base_url=self.base_url, headers=self.headers, timeout=15
+                )
+            async with client:
+                return await asyncio.gather(
+                    *(client.get(f"/company/{symbol}") for symbol in symbols),
+                    return_exceptions=True,
+                )
+
+        responses = asyncio.run(fetch_all())
+
+        details = {}
+        for symbol, response in zip(symbols, responses):
+            if isinstance(response, Exception):
+                logger.error("Error fetching company details for %s: %s", symbol, response)
+                details[symbol] = {'symbol': symbol}
+                continue
+            try:
+                soup = BeautifulSoup(response.content, 'lxml')
+                details[symbol] = self._extract_company_details(soup, symbol)
+            except Exception:
+                logger.exception("Error parsing company details for %s", symbol)
+                details[symbol] = {'symbol': symbol}
+
+        return details
+
     def get_market_news(self, limit=10):
         """Get latest market news"""
         try:
             # Fetch the news page
-            response = requests.get(f"{self.base_url}/news", headers=self.headers)
-            soup = BeautifulSoup(response.text, 'lxml')
+            soup = BeautifulSoup(self._get_page('/news'), 'lxml')
             
             # Extract news
             news_items = self._extract_news(soup, limit)
             
             return news_items
-        except Exception as e:
-            print(f"Error fetching market news: {str(e)}")
-            return []
-    
-    def _extract_sector_summary(self, soup):
-        """Extract sector summary data"""
-        try:
-            sector_data = []
-            sector_table = soup.find('table', {'id': 'sector-turnover'})
-            
-            if not sector_table:
-                # Try alternative method
-                sector_div = soup.find('div', class_='sector-turnover')
-                if sector_div:
-                    sector_text = sector_div.get_text()
-                    # Parse the text to extract sector data
-                    lines = sector_text.strip().split('\n')
-                    for i in range(0, len(lines), 3):
-                        if i+2 < len(lines):
-                            sector = {
-                                'name': lines[i].strip(),
-                                'turnover': self._parse_number(lines[i+1].strip()),
-                                'volume': self._parse_number(lines[i+2].strip())
-                            }
-                            sector_data.append(sector)
-                return sector_data
-            
-            # Parse table if found
-            rows = sector_table.find_all('tr')[1:]  # Skip header
-            for row in rows:
-                cols = row.find_all('td')
-                if len(cols) >= 3:
-                    sector = {
-                        'name': cols[0].text.strip(),
-                        'turnover': self._parse_number(cols[1].text.strip()),
-                        'volume': self._parse_number(cols[2].text.strip())
-                    }
-                    sector_data.append(sector)
-            
-            return sector_data
-        except Exception as e:
-            print(f"Error extracting sector summary: {str(e)}")
-            return []
-    
-    def _extract_top_gainers(self, soup):
-        """Extract top gainers data"""
-        try:
-            gainers = []
-            gainers_table = soup.find('table', {'id': 'top-gainers'})
-            
-            if not gainers_table:
-                # Try alternative method
-                gainers_div = soup.find('div', class_='top-gainers')
-                if gainers_div:
-                    # Parse the div content
-                    items = gainers_div.find_all('div', class_='item')
-                    for item in items:
-                        symbol = item.find('div', class_='symbol').text.strip()
-                        ltp = self._parse_number(item.find('div', class_='ltp').text.strip())
-                        change = self._parse_number(item.find('div', class_='change').text.strip())
-                        gainers.append({
-                            'symbol': symbol,
-                            'ltp': ltp,
-                            'change': change,
-                            'changePercent': (change / (ltp - change)) * 100 if ltp - change > 0 else 0
-                        })
-                return gainers
-            
-            # Parse table if found
-            rows = gainers_table.find_all('tr')[1:]  # Skip header
-            for row in rows:
-                cols = row.find_all('td')
-                if len(cols) >= 4:
-                    gainer = {
-                        'symbol': cols[0].text.strip(),
-                        'ltp': self._parse_number(cols[1].text.strip()),
-                        'change': self._parse_number(cols[2].text.strip()),
-                        'changePercent': self._parse_number(cols[3].text.strip().replace('%', ''))
-                    }
-                    gainers.append(gainer)
-            
-            return gainers
-        except Exception as e:
-            print(f"Error extracting top gainers: {str(e)}")
-            return []
-    
-    def _extract_top_losers(self, soup):
-        """Extract top losers data"""
-        try:
-            losers = []
-            losers_table = soup.find('table', {'id': 'top-losers'})
-            
-            if not losers_table:
-                # Try alternative method
-                losers_div = soup.find('div', class_='top-losers')
-                if losers_div:
-                    # Parse the div content
-                    items = losers_div.find_all('div', class_='item')
-                    for item in items:
-                        symbol = item.find('div', class_='symbol').text.strip()
-                        ltp = self._parse_number(item.find('div', class_='ltp').text.strip())
-                        change = self._parse_number(item.find('div', class_='change').text.strip())
-                        losers.append({
-                            'symbol': symbol,
-                            'ltp': ltp,
-                            'change': change,
-                            'changePercent': (change / (ltp - change)) * 100 if ltp - change > 0 else 0
-                        })
-                return losers
-            
-            # Parse table if found
-            rows = losers_table.find_all('tr')[1:]  # Skip header
-            for row in rows:
-                cols = row.find_all('td')
-                if len(cols) >= 4:
-                    loser = {
-                        'symbol': cols[0].text.strip(),
-                        'ltp': self._parse_number(cols[1].text.strip()),
-                        'change': self._parse_number(cols[2].text.strip()),
-                        'changePercent': self._parse_number(cols[3].text.strip().replace('%', ''))
-                    }
-                    losers.append(loser)
-            
-            return losers
-        except Exception as e:
-            print(f"Error extracting top losers: {str(e)}")
+        except Exception:
+            logger.exception("Error fetching market news")
             return []
     
-    def _extract_top_turnover(self, soup):
-        """Extract top turnover data"""
-        try:
-            turnover_stocks = []
-            turnover_table = soup.find('table', {'id': 'top-turnover'})
-            
-            if not turnover_table:
-                # Try alternative method
-                turnover_div = soup.find('div', class_='top-turnover')
-                if turnover_div:
-                    # Parse the div content
-                    items = turnover_div.find_all('div', class_='item')
-                    for item in items:
-                        symbol = item.find('div', class_='symbol').text.strip()
-                        turnover = self._parse_number(item.find('div', class_='turnover').text.strip())
-                        turnover_stocks.append({
-                            'symbol': symbol,
-                            'turnover': turnover
-                        })
-                return turnover_stocks
-            
-            # Parse table if found
-            rows = turnover_table.find_all('tr')[1:]  # Skip header
-            for row in rows:
-                cols = row.find_all('td')
-                if len(cols) >= 2:
-                    stock = {
-                        'symbol': cols[0].text.strip(),
-                        'turnover': self._parse_number(cols[1].text.strip())
-                    }
-                    turnover_stocks.append(stock)
-            
-            return turnover_stocks
-        except Exception as e:
-            print(f"Error extracting top turnover: {str(e)}")
+    def get_market_snapshot(self, news_limit=10, symbol=None):
+        """Fetch market data, news and (optionally) one company concurrently.
+
+        The pages are independent network calls, so fetching them through a
+        thread pool costs the slowest round-trip instead of the sum.
+        """
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            market_future = executor.submit(self.get_latest_market_data)
+            news_future = executor.submit(self.get_market_news, news_limit)
+            company_future = executor.submit(self.get_company_details, symbol) if symbol else None
+
+            snapshot = {
+                'market': market_future.result(),
+                'news': news_future.result(),
+            }
+            if company_future:
+                snapshot['company'] = company_future.result()
+
+            return snapshot
+
+    def _sector_row(self, cells):
+        return {
+            'name': cells[0],
+            'turnover': self._parse_number(cells[1]),
+            'volume': self._parse_number(cells[2])
+        }
+
+    def _mover_row(self, cells):
+        return {
+            'symbol': cells[0],
+            'ltp': self._parse_number(cells[1]),
+            'change': self._parse_number(cells[2]),
+            'changePercent': self._parse_number(cells[3].replace('%', ''))
+        }
+
+    def _turnover_row(self, cells):
+        return {
+            'symbol': cells[0],
+            'turnover': self._parse_number(cells[1])
+        }
+
+    def _volume_row(self, cells):
+        return {
+            'symbol': cells[0],
+            'volume': self._parse_number(cells[1])
+        }
+
+    def _selectolax_table_rows(self, tree, table_id, limit=None):
+        """Cell texts per data row of a table, or None if the table is missing"""
+        selector = _CSS_TABLE_SELECTORS.get(table_id) or f'table#{table_id}'
+        table = tree.css_first(selector)
+        if table is None:
+            return None
+        rows = table.css('tr')[1:]  # Skip header
+        if limit is not None:
+            rows = rows[:limit]
+        return [[cell.text(strip=True) for cell in row.css('td')] for row in rows]
+
+    def _extract_with_selectolax(self, html, limit=None):
+        """Extract the market data sections from a selectolax tree.
+
+        Returns None when any expected table is missing; the caller then
+        falls back to the BeautifulSoup extractors, which also understand
+        the div-based page layout.
+        """
+        tree = HTMLParser(html)
+
+        market_data = {}
+        for key, table_id, min_cols, parser_name in _TABLE_SECTIONS:
+            rows = self._selectolax_table_rows(tree, table_id, limit)
+            if rows is None:
+                return None
+            row_parser = getattr(self, parser_name)
+            market_data[key] = [row_parser(cells) for cells in rows if len(cells) >= min_cols]
+
+        summary = {}
+        summary_div = tree.css_first(_CSS_SUMMARY_DIV)
+        if summary_div is not None:
+            for item in summary_div.css(_CSS_SUMMARY_ITEM):
+                name_node = item.css_first(_CSS_ITEM_NAME)
+                value_node = item.css_first(_CSS_ITEM_VALUE)
+                if name_node and value_node:
+                    name = name_node.text(strip=True).lower().replace(' ', '_')
+                    summary[name] = self._parse_number(value_node.text(strip=True))
+        market_data['market_summary'] = summary
+
+        return market_data
+
+    def _lxml_table_rows(self, tree, table_id, limit=None):
+        """Cell texts per data row of a table, or None if the table is missing"""
+        tables = _XP_TABLE_BY_ID(tree, table_id=table_id)
+        if not tables:
+            return None
+        table = tables[0]
+        # One traversal collects every data cell, instead of a per-row
+        # xpath round-trip into libxml2; reshape by the first row's width.
+        cells = _XP_DATA_CELLS(table)
+        if not cells:
             return []
-    
-    def _extract_top_volume(self, soup):
-        """Extract top volume data"""
-        try:
-            volume_stocks = []
-            volume_table = soup.find('table', {'id': 'top-volume'})
-            
-            if not volume_table:
-                # Try alternative method
-                volume_div = soup.find('div', class_='top-volume')
-                if volume_div:
-                    # Parse the div content
-                    items = volume_div.find_all('div', class_='item')
-                    for item in items:
-                        symbol = item.find('div', class_='symbol').text.strip()
-                        volume = self._parse_number(item.find('div', class_='volume').text.strip())
-                        volume_stocks.append({
-                            'symbol': symbol,
-                            'volume': volume
-                        })
-                return volume_stocks
-            
-            # Parse table if found
-            rows = volume_table.find_all('tr')[1:]  # Skip header
-            for row in rows:
-                cols = row.find_all('td')
-                if len(cols) >= 2:
-                    stock = {
-                        'symbol': cols[0].text.strip(),
-                        'volume': self._parse_number(cols[1].text.strip())
-                    }
-                    volume_stocks.append(stock)
-            
-            return volume_stocks
-        except Exception as e:
-            print(f"Error extracting top volume: {str(e)}")
+        width = len(_XP_FIRST_DATA_ROW_CELLS(table))
+        if width and len(cells) % width == 0:
+            if limit is not None:
+                cells = cells[:limit * width]
+            texts = [cell.text_content().strip() for cell in cells]
+            return [texts[i:i + width] for i in range(0, len(texts), width)]
+        # Ragged table (colspans etc.) -- fall back to row-by-row slicing
+        rows = _XP_ROWS(table)[1:]
+        if limit is not None:
+            rows = rows[:limit]
+        return [[cell.text_content().strip() for cell in _XP_ROW_CELLS(row)] for row in rows]
+
+    def _extract_with_lxml(self, html, limit=None):
+        """Extract the market data sections straight from an lxml tree.
+
+        Same contract as _extract_with_selectolax: returns None when any
+        expected table is missing so the BeautifulSoup fallback can run.
+        """
+        tree = lxml.html.fromstring(html)
+
+        market_data = {}
+        for key, table_id, min_cols, parser_name in _TABLE_SECTIONS:
+            rows = self._lxml_table_rows(tree, table_id, limit)
+            if rows is None:
+                return None
+            row_parser = getattr(self, parser_name)
+            market_data[key] = [row_parser(cells) for cells in rows if len(cells) >= min_cols]
+
+        summary = {}
+        for item in _XP_SUMMARY_ITEMS(tree):
+            names = _XP_ITEM_NAMES(item)
+            values = _XP_ITEM_VALUES(item)
+            if names and values:
+                name = names[0].text_content().strip().lower().replace(' ', '_')
+                summary[name] = self._parse_number(values[0].text_content().strip())
+        market_data['market_summary'] = summary
+
+        return market_data
+
+    def _extract_table_section(self, soup, key, table_id, min_cols, parser_name,
+                               limit=None):
+        """Extract one section from the BeautifulSoup tree.
+
+        Tries the table layout first (same specs as the fast paths), then
+        the div-based fallback layout. Raises on malformed markup;
+        get_latest_market_data holds the guard.
+        """
+        table = soup.find('table', {'id': table_id})
+        if table:
+            row_parser = getattr(self, parser_name)
+            results = []
+            # limit+1 covers the header row; find_all stops its
+            # traversal at the limit instead of materialising all rows
+            rows = table.find_all('tr', limit=limit + 1 if limit else None)
+            for row in rows[1:]:  # Skip header
+                cells = [col.text.strip() for col in row.find_all('td')]
+                if len(cells) >= min_cols:
+                    results.append(row_parser(cells))
+            return results
+
+        return self._extract_div_fallback(soup, key, table_id, limit)
+
+    def _extract_div_fallback(self, soup, key, class_name, limit=None):
+        """Extract a section from the div-based fallback layout"""
+        if key == 'sector_summary':
+            return self._extract_sector_div(soup)
+
+        container = soup.find('div', class_=class_name)
+        if not container:
             return []
-    
+
+        results = []
+        for item in container.find_all('div', class_='item', limit=limit):
+            symbol = item.find('div', class_='symbol').text.strip()
+            if key in ('top_gainers', 'top_losers'):
+                ltp = self._parse_number(item.find('div', class_='ltp').text.strip())
+                change = self._parse_number(item.find('div', class_='change').text.strip())
+                results.append({
+                    'symbol': symbol,
+                    'ltp': ltp,
+                    'change': change,
+                    'changePercent': (change / (ltp - change)) * 100 if ltp - change > 0 else 0
+                })
+            else:
+                field = 'turnover' if key == 'top_turnover' else 'volume'
+                results.append({
+                    'symbol': symbol,
+                    field: self._parse_number(item.find('div', class_=field).text.strip())
+                })
+
+        return results
+
+    def _extract_sector_div(self, soup):
+        """Parse the free-text sector summary div (name/turnover/volume triplets)"""
+        sector_data = []
+        sector_div = soup.find('div', class_='sector-turnover')
+        if sector_div:
+            lines = sector_div.get_text().strip().split('\n')
+            for i in range(0, len(lines), 3):
+                if i+2 < len(lines):
+                    sector_data.append({
+                        'name': lines[i].strip(),
+                        'turnover': self._parse_number(lines[i+1].strip()),
+                        'volume': self._parse_number(lines[i+2].strip())
+                    })
+        return sector_data
+
     def _extract_market_summary(self, soup):
-        """Extract market summary data"""
-        try:
-            summary = {}
-            summary_div = soup.find('div', class_='market-summary')
-            
-            if not summary_div:
-                # Try alternative method
-                nepse_div = soup.find('div', class_='nepse-index')
-                if nepse_div:
-                    summary['nepse'] = self._parse_number(nepse_div.find('div', class_='value').text.strip())
-                    summary['nepse_change'] = self._parse_number(nepse_div.find('div', class_='change').text.strip())
-                    
-                    # Try to find other indices
-                    indices_div = soup.find('div', class_='indices')
-                    if indices_div:
-                        items = indices_div.find_all('div', class_='index-item')
-                        for item in items:
-                            name = item.find('div', class_='name').text.strip().lower().replace(' ', '_')
-                            value = self._parse_number(item.find('div', class_='value').text.strip())
-                            summary[name] = value
-                
-                # Try to find market stats
-                stats_div = soup.find('div', class_='market-stats')
-                if stats_div:
-                    items = stats_div.find_all('div', class_='stat-item')
+        """Extract market summary data; the public callers hold the guard"""
+        summary = {}
+        summary_div = soup.find('div', class_='market-summary')
+
+        if not summary_div:
+            # Try alternative method
+            nepse_div = soup.find('div', class_='nepse-index')
+            if nepse_div:
+                summary['nepse'] = self._parse_number(nepse_div.find('div', class_='value').text.strip())
+                summary['nepse_change'] = self._parse_number(nepse_div.find('div', class_='change').text.strip())
+
+                # Try to find other indices
+                indices_div = soup.find('div', class_='indices')
+                if indices_div:
+                    items = indices_div.find_all('div', class_='index-item')
                     for item in items:
                         name = item.find('div', class_='name').text.strip().lower().replace(' ', '_')
                         value = self._parse_number(item.find('div', class_='value').text.strip())
                         summary[name] = value
-                
-                return summary
-            
-            # Parse div if found
-            items = summary_div.find_all('div', class_='summary-item')
-            for item in items:
-                name = item.find('div', class_='name').text.strip().lower().replace(' ', '_')
-                value_div = item.find('div', class_='value')
-                if value_div:
-                    value = self._parse_number(value_div.text.strip())
+
+            # Try to find market stats
+            stats_div = soup.find('div', class_='market-stats')
+            if stats_div:
+                items = stats_div.find_all('div', class_='stat-item')
+                for item in items:
+                    name = item.find('div', class_='name').text.strip().lower().replace(' ', '_')
+                    value = self._parse_number(item.find('div', class_='value').text.strip())
                     summary[name] = value
-            
+
             return summary
-        except Exception as e:
-            print(f"Error extracting market summary: {str(e)}")
-            return {}
+
+        # Parse div if found
+        items = summary_div.find_all('div', class_='summary-item')
+        for item in items:
+            name = item.find('div', class_='name').text.strip().lower().replace(' ', '_')
+            value_div = item.find('div', class_='value')
+            if value_div:
+                value = self._parse_number(value_div.text.strip())
+                summary[name] = value
+
+        return summary
     
     def _extract_company_details(self, soup, symbol):
-        """Extract company details"""
-        try:
-            company = {
-                'symbol': symbol,
-                'name': '',
-                'sector': '',
-                'listed_shares': 0,
-                'market_cap': 0,
-                'pe_ratio': 0,
-                'book_value': 0,
-                'eps': 0,
-                'dividend': 0,
-                'dividend_yield': 0,
-                'roe': 0,
-                'last_traded_price': 0,
-                'high_low_52w': {'high': 0, 'low': 0}
-            }
-            
-            # Extract company name and sector
-            company_header = soup.find('div', class_='company-header')
-            if company_header:
-                name_div = company_header.find('h1')
-                if name_div:
-                    company['name'] = name_div.text.strip()
-                
-                sector_div = company_header.find('div', class_='sector')
-                if sector_div:
-                    company['sector'] = sector_div.text.strip()
-            
-            # Extract financial details
-            details_table = soup.find('table', class_='company-details')
-            if details_table:
-                rows = details_table.find_all('tr')
-                for row in rows:
-                    cols = row.find_all('td')
-                    if len(cols) >= 2:
-                        key = cols[0].text.strip().lower().replace(' ', '_')
-                        value = cols[1].text.strip()
-                        
-                        if key == 'listed_shares':
-                            company['listed_shares'] = self._parse_number(value)
-                        elif key == 'market_capitalization':
-                            company['market_cap'] = self._parse_number(value)
-                        elif key == 'pe_ratio':
-                            company['pe_ratio'] = self._parse_number(value)
-                        elif key == 'book_value':
-                            company['book_value'] = self._parse_number(value)
-                        elif key == 'eps':
-                            company['eps'] = self._parse_number(value)
-                        elif key == 'dividend':
-                            company['dividend'] = self._parse_number(value)
-                        elif key == 'dividend_yield':
-                            company['dividend_yield'] = self._parse_number(value.replace('%', ''))
-                        elif key == 'roe':
-                            company['roe'] = self._parse_number(value.replace('%', ''))
-            
-            # Extract price information
-            price_div = soup.find('div', class_='current-price')
-            if price_div:
-                company['last_traded_price'] = self._parse_number(price_div.text.strip())
-            
-            # Extract 52-week high/low
-            high_low_div = soup.find('div', class_='high-low')
-            if high_low_div:
-                high_div = high_low_div.find('div', class_='high')
-                low_div = high_low_div.find('div', class_='low')
-                
-                if high_div:
-                    company['high_low_52w']['high'] = self._parse_number(high_div.text.strip())
-                if low_div:
-                    company['high_low_52w']['low'] = self._parse_number(low_div.text.strip())
-            
-            return company
-        except Exception as e:
-            print(f"Error extracting company details: {str(e)}")
-            return {'symbol': symbol}
+        """Extract company details; the public callers hold the guard"""
+        company = {
+            'symbol': symbol,
+            'name': '',
+            'sector': '',
+            'listed_shares': 0,
+            'market_cap': 0,
+            'pe_ratio': 0,
+            'book_value': 0,
+            'eps': 0,
+            'dividend': 0,
+            'dividend_yield': 0,
+            'roe': 0,
+            'last_traded_price': 0,
+            'high_low_52w': {'high': 0, 'low': 0}
+        }
+
+        # Extract company name and sector
+        company_header = soup.find('div', class_='company-header')
+        if company_header:
+            name_div = company_header.find('h1')
+            if name_div:
+                company['name'] = name_div.text.strip()
+
+            sector_div = company_header.find('div', class_='sector')
+            if sector_div:
+                company['sector'] = sector_div.text.strip()
+
+        # Extract financial details
+        details_table = soup.find('table', class_='company-details')
+        if details_table:
+            rows = details_table.find_all('tr')
+            for row in rows:
+                cols = row.find_all('td')
+                if len(cols) >= 2:
+                    key = cols[0].text.strip().lower().replace(' ', '_')
+                    value = cols[1].text.strip()
+
+                    if key == 'listed_shares':
+                        company['listed_shares'] = self._parse_number(value)
+                    elif key == 'market_capitalization':
+                        company['market_cap'] = self._parse_number(value)
+                    elif key == 'pe_ratio':
+                        company['pe_ratio'] = self._parse_number(value)
+                    elif key == 'book_value':
+                        company['book_value'] = self._parse_number(value)
+                    elif key == 'eps':
+                        company['eps'] = self._parse_number(value)
+                    elif key == 'dividend':
+                        company['dividend'] = self._parse_number(value)
+                    elif key == 'dividend_yield':
+                        company['dividend_yield'] = self._parse_number(value.replace('%', ''))
+                    elif key == 'roe':
+                        company['roe'] = self._parse_number(value.replace('%', ''))
+
+        # Extract price information
+        price_div = soup.find('div', class_='current-price')
+        if price_div:
+            company['last_traded_price'] = self._parse_number(price_div.text.strip())
+
+        # Extract 52-week high/low
+        high_low_div = soup.find('div', class_='high-low')
+        if high_low_div:
+            high_div = high_low_div.find('div', class_='high')
+            low_div = high_low_div.find('div', class_='low')
+
+            if high_div:
+                company['high_low_52w']['high'] = self._parse_number(high_div.text.strip())
+            if low_div:
+                company['high_low_52w']['low'] = self._parse_number(low_div.text.strip())
+
+        return company
     
     def _extract_news(self, soup, limit):
-        """Extract news items"""
-        try:
-            news_items = []
-            news_list = soup.find('div', class_='news-list')
-            
-            if not news_list:
-                return []
-            
-            news_divs = news_list.find_all('div', class_='news-item', limit=limit)
-            
-            for news_div in news_divs:
-                news = {
-                    'title': '',
-                    'date': '',
-                    'summary': '',
-                    'url': ''
-                }
-                
-                title_div = news_div.find('div', class_='title')
-                if title_div:
-                    a_tag = title_div.find('a')
-                    if a_tag:
-                        news['title'] = a_tag.text.strip()
-                        news['url'] = f"{self.base_url}{a_tag.get('href', '')}" if a_tag.get('href', '').startswith('/') else a_tag.get('href', '')
-                
-                date_div = news_div.find('div', class_='date')
-                if date_div:
-                    news['date'] = date_div.text.strip()
-                
-                summary_div = news_div.find('div', class_='summary')
-                if summary_div:
-                    news['summary'] = summary_div.text.strip()
-                
-                news_items.append(news)
-            
-            return news_items
-        except Exception as e:
-            print(f"Error extracting news: {str(e)}")
+        """Extract news items; the public callers hold the guard"""
+        news_items = []
+        news_list = soup.find('div', class_='news-list')
+
+        if not news_list:
             return []
+
+        news_divs = news_list.find_all('div', class_='news-item', limit=limit)
+
+        for news_div in news_divs:
+            news = {
+                'title': '',
+                'date': '',
+                'summary': '',
+                'url': ''
+            }
+
+            title_div = news_div.find('div', class_='title')
+            if title_div:
+                a_tag = title_div.find('a')
+                if a_tag:
+                    news['title'] = a_tag.text.strip()
+                    news['url'] = f"{self.base_url}{a_tag.get('href', '')}" if a_tag.get('href', '').startswith('/') else a_tag.get('href', '')
+
+            date_div = news_div.find('div', class_='date')
+            if date_div:
+                news['date'] = date_div.text.strip()
+
+            summary_div = news_div.find('div', class_='summary')
+            if summary_div:
+                news['summary'] = summary_div.text.strip()
+
+            news_items.append(news)
+
+        return news_items
     
     def _parse_number(self, text):
         """Parse number from text, handling commas and other formatting"""
         try:
             # Remove commas and other non-numeric characters except decimal point and minus sign
-            clean_text = ''.join(c for c in text if c.isdigit() or c in ['.', '-'])
-            
+            clean_text = _NON_NUMERIC_RE.sub('', text)
+
             # Convert to float or int
             if '.' in clean_text:
                 return float(clean_text)
@@ -452,5 +658,13 @@ class MerolaganiService:
         except Exception:
             return 0
 
-# Add missing import
-from datetime import timedelta
\ No newline at end of file
+# Process-wide default instance: every caller shares one warm page cache
+# layered on the module session's keep-alive connection pool
+_default_instance = None
+
+def get_merolagani_service():
+    """Get the shared MerolaganiService instance for this process"""
+    global _default_instance
+    if _default_instance is None:
+        _default_instance = MerolaganiService()
+    return _default_instance
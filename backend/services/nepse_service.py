@@ -1,53 +1,298 @@
+import heapq
+from collections import defaultdict
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import time
+from io import StringIO
 from datetime import datetime, timedelta
 import pandas as pd
-from bs4 import BeautifulSoup
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from utils import format_nepal_time, is_market_open, json_loads
+
+# Shared session: keep-alive connections to the NEPSE endpoints are reused
+# across calls instead of paying a new TCP/TLS handshake per request, and
+# transient upstream hiccups get retried with backoff in urllib3
+_session = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+)
+_session.mount('https://', _adapter)
+_session.mount('http://', _adapter)
+
+# Parsed-result TTL cache windows, in seconds. NEPSE data moves every few
+# seconds at most while trading and not at all when closed, so repeat
+# calls inside the window become a dict lookup instead of an HTTP round-trip.
+CACHE_TTL_OPEN = 30
+CACHE_TTL_CLOSED = 600
+
+# Upper bound on concurrently fetched floorsheet pages (500 rows each);
+# keeps a very heavy trading day from turning into an unbounded fan-out
+FLOORSHEET_MAX_PAGES = 40
+
+# Long-lived pool for racing the unofficial and official endpoints; a
+# per-call executor would block its exit on the losing request
+_race_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='nepse-race')
+
+def _has_content(result):
+    """Truthiness check that also works for DataFrames (no ambiguous bool)"""
+    try:
+        return bool(result)
+    except ValueError:
+        return len(result) > 0
+
+def _coalesce_columns(df, names, default):
+    """Per-row first truthy value across the named columns.
+
+    Vectorized equivalent of item.get(a) or item.get(b) or default:
+    falsy cells (0, '', None) fall through to the next source column.
+    """
+    series = None
+    for name in names:
+        if name not in df.columns:
+            continue
+        column = df[name].replace({0: None, 0.0: None, '': None})
+        series = column if series is None else series.combine_first(column)
+    if series is None:
+        return pd.Series(default, index=df.index)
+    return series.fillna(default)
+
+def _numeric_columns(df, names, cast=float):
+    """Coalesced column cast to numbers, with unparseable cells as 0"""
+    series = pd.to_numeric(_coalesce_columns(df, names, 0), errors='coerce')
+    return series.fillna(0).astype(cast)
+
+def _compile_unpacker(name, fields):
+    """Generate a row unpacker specialized to a fixed field mapping.
+
+    ``fields`` is a sequence of (output key, expression) pairs where each
+    expression may use ``get`` (bound to ``item.get``). The generated
+    function inlines the whole mapping in a single dict display, so
+    parsing a row is one call with no per-field Python loop or spec
+    lookup left at runtime.
+    """
+    items = ', '.join(f'{key!r}: {expr}' for key, expr in fields)
+    src = f'def {name}(item):\n    get = item.get\n    return {{{items}}}'
+    namespace = {}
+    exec(compile(src, f'<generated {name}>', 'exec'), namespace)
+    return namespace[name]
+
+_unpack_index = _compile_unpacker('_unpack_index', (
+    ('name', "get('indexName') or get('name') or ''"),
+    ('value', "float(get('indexValue') or get('value') or 0)"),
+    ('change', "float(get('change') or 0)"),
+    ('changePercent', "float(get('percentageChange') or 0)"),
+    ('high', "float(get('high') or 0)"),
+    ('low', "float(get('low') or 0)"),
+    ('turnover', "float(get('turnover') or 0)"),
+))
+
+_unpack_depth_order = _compile_unpacker('_unpack_depth_order', (
+    ('price', "float(get('price') or 0)"),
+    ('quantity', "int(get('quantity') or 0)"),
+    ('orders', "int(get('orders') or 1)"),
+))
+
+def _records_at_edge(frame):
+    """Convert a cached columnar result to JSON-ready records.
+
+    Floorsheet/historical results live in the cache as DataFrames (a few
+    NumPy arrays) rather than thousands of per-row dicts; the dicts are
+    only materialized here, at the API boundary.
+    """
+    if frame is None:
+        return []
+    if isinstance(frame, pd.DataFrame):
+        return frame.to_dict('records')
+    return frame
 
 class NepseService:
     def __init__(self):
         # Official NEPSE API (may not be reliable)
         self.nepse_base_url = 'https://nepalstock.com/api'
-        
+
         # Unofficial API that provides more reliable data
         self.unofficial_api_url = 'https://nepalstock.onrender.com'
-        
+
         # Headers to mimic browser request
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'application/json, text/plain, */*',
+            # Multi-MB JSON bodies (today-price, floorsheet) compress
+            # 60-80%; urllib3 decompresses transparently in C, and
+            # json_loads reads the bytes without ever building .text
+            'Accept-Encoding': 'gzip, deflate, br',
             'Accept-Language': 'en-US,en;q=0.9',
             'Origin': 'https://nepalstock.com',
             'Referer': 'https://nepalstock.com/'
         }
+
+        # Headers ride on the session so they are serialized once, not
+        # rebuilt and merged per call
+        self.session = _session
+        self.session.headers.update(self.headers)
+
+        # When httpx is installed, raced endpoint calls multiplex over a
+        # single HTTP/2 connection instead of opening one socket each;
+        # the requests session stays as the fallback transport
+        self._http2_client = None
+        if httpx is not None:
+            try:
+                self._http2_client = httpx.Client(
+                    http2=True, headers=self.headers, timeout=10)
+            except ImportError:
+                # httpx installed without the h2 extra
+                self._http2_client = httpx.Client(
+                    headers=self.headers, timeout=10)
+
+        # endpoint key -> (stored_at, ttl, result)
+        self._cache = {}
     
     def get_current_time(self):
         """Get current time in Nepal timezone (UTC+5:45)"""
-        utc_now = datetime.utcnow()
-        nepal_offset = timedelta(hours=5, minutes=45)
-        nepal_time = utc_now + nepal_offset
-        return nepal_time.strftime('%Y-%m-%d %H:%M:%S')
+        return format_nepal_time()
     
+    def _get_json(self, url, params=None):
+        """GET url and return the decoded JSON body; raises on HTTP errors"""
+        if self._http2_client is not None:
+            try:
+                response = self._http2_client.get(url, params=params)
+                response.raise_for_status()
+                return json_loads(response.content)
+            except httpx.HTTPStatusError:
+                raise
+            except httpx.HTTPError:
+                # Transport-level failure; retry over the requests
+                # session, which has urllib3 retries mounted
+                pass
+        response = self.session.get(url, params=params, timeout=10)
+        response.raise_for_status()
+        return json_loads(response.content)
+
+    def _race_endpoints(self, unofficial_loader, official_loader):
+        """Run both endpoint loaders concurrently; first success wins.
+
+        The sequential fallback chain made tail latency the unofficial
+        timeout plus the official round-trip; racing makes it the faster
+        of the two. The unofficial result is still preferred whenever
+        both finish together.
+        """
+        unofficial = _race_executor.submit(unofficial_loader)
+        official = _race_executor.submit(official_loader)
+        pending = {unofficial, official}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            # Order unofficial first so it wins simultaneous finishes
+            for future in sorted(done, key=lambda f: f is official):
+                try:
+                    result = future.result()
+                    if _has_content(result):
+                        for leftover in pending:
+                            leftover.cancel()
+                        return result
+                except Exception as e:
+                    source = 'unofficial' if future is unofficial else 'official'
+                    print(f"Error fetching from {source} API: {str(e)}")
+        return None
+
+    def _cached(self, key, loader):
+        """Serve key from the TTL cache, or run loader and store the result.
+
+        Failed loads (falsy results) are not stored, so the next call
+        retries upstream instead of pinning an empty response.
+        """
+        now = time.monotonic()
+        hit = self._cache.get(key)
+        if hit and now - hit[0] < hit[1]:
+            return hit[2]
+
+        result = loader()
+        if _has_content(result):
+            ttl = CACHE_TTL_OPEN if is_market_open() else CACHE_TTL_CLOSED
+            self._cache[key] = (now, ttl, result)
+        return result
+
+    def get_market_overview(self, limit=10):
+        """Fetch the full dashboard dataset in one concurrent burst.
+
+        The five endpoints are independent network calls, so running them
+        through a thread pool costs the slowest round-trip instead of the
+        sum of all five.
+        """
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = {
+                'stocks': executor.submit(self.get_all_stocks),
+                'indices': executor.submit(self.get_indices),
+                'top_gainers': executor.submit(self.get_top_gainers, limit),
+                'top_losers': executor.submit(self.get_top_losers, limit),
+                'sectors': executor.submit(self.get_sector_data),
+            }
+            return {key: future.result() for key, future in futures.items()}
+
+    # Public getters: thin TTL-cached wrappers over the _fetch_* workers.
+    # Cache keys mirror the upstream endpoint plus its arguments.
     def get_all_stocks(self):
         """Get all stocks data from unofficial API"""
-        try:
-            # Try unofficial API first
-            response = requests.get(f"{self.unofficial_api_url}/nepse-data/today-price")
-            if response.status_code == 200:
-                data = response.json()
-                return self._parse_stock_data(data)
-        except Exception as e:
-            print(f"Error fetching from unofficial API: {str(e)}")
-        
-        # Fallback to official API
-        try:
-            response = requests.get(f"{self.nepse_base_url}/nots/securityDailyTradeStat/58", headers=self.headers)
-            if response.status_code == 200:
-                data = response.json()
-                return self._parse_stock_data(data)
-        except Exception as e:
-            print(f"Error fetching from official API: {str(e)}")
-            
+        return _records_at_edge(self._cached('all_stocks', self._fetch_all_stocks))
+
+    def get_indices(self):
+        """Get market indices data"""
+        return self._cached('indices', self._fetch_indices)
+
+    def get_top_gainers(self, limit=10):
+        """Get top gaining stocks"""
+        return self._cached(f'top_gainers:{limit}', lambda: self._fetch_top_gainers(limit))
+
+    def get_top_losers(self, limit=10):
+        """Get top losing stocks"""
+        return self._cached(f'top_losers:{limit}', lambda: self._fetch_top_losers(limit))
+
+    def get_sector_data(self):
+        """Get sector-wise data"""
+        return self._cached('sector_data', self._fetch_sector_data)
+
+    def get_stock(self, symbol):
+        """Get specific stock data"""
+        return self._cached(f'stock:{symbol}', lambda: self._fetch_stock(symbol))
+
+    def get_historical_data(self, symbol, days=30):
+        """Get historical data for a stock"""
+        frame = self._cached(f'historical:{symbol}:{days}',
+                             lambda: self._fetch_historical_data(symbol, days))
+        return _records_at_edge(frame)
+
+    def get_market_depth(self, symbol):
+        """Get market depth (order book) for a stock"""
+        return self._cached(f'market_depth:{symbol}', lambda: self._fetch_market_depth(symbol))
+
+    def get_floorsheet(self, date=None):
+        """Get floorsheet data"""
+        frame = self._cached(f'floorsheet:{date}', lambda: self._fetch_floorsheet(date))
+        return _records_at_edge(frame)
+
+    def get_market_status(self):
+        """Check if market is open"""
+        return self._cached('market_status', self._fetch_market_status)
+
+    def _fetch_all_stocks(self):
+        """Get all stocks data, racing the unofficial and official APIs"""
+        stocks = self._race_endpoints(
+            lambda: self._parse_stock_data(
+                self._get_json(f"{self.unofficial_api_url}/nepse-data/today-price")),
+            lambda: self._parse_stock_data(
+                self._get_json(f"{self.nepse_base_url}/nots/securityDailyTradeStat/58")),
+        )
+        if _has_content(stocks):
+            return stocks
+
         # If both APIs fail, scrape from website
         try:
             return self._scrape_stock_data_from_website()
@@ -55,131 +300,131 @@ class NepseService:
             print(f"Error scraping website: {str(e)}")
             return []
     
-    def get_indices(self):
+    def _fetch_indices(self):
         """Get market indices data"""
         try:
             # Try unofficial API first
-            response = requests.get(f"{self.unofficial_api_url}/index")
+            response = self.session.get(f"{self.unofficial_api_url}/index")
             if response.status_code == 200:
-                data = response.json()
+                data = json_loads(response.content)
                 return self._parse_index_data(data)
         except Exception as e:
             print(f"Error fetching indices from unofficial API: {str(e)}")
         
         # Fallback to official API
         try:
-            response = requests.get(f"{self.nepse_base_url}/nots/index", headers=self.headers)
+            response = self.session.get(f"{self.nepse_base_url}/nots/index")
             if response.status_code == 200:
-                data = response.json()
+                data = json_loads(response.content)
                 return self._parse_index_data(data)
         except Exception as e:
             print(f"Error fetching indices from official API: {str(e)}")
             return []
     
-    def get_top_gainers(self, limit=10):
+    def _fetch_top_gainers(self, limit=10):
         """Get top gaining stocks"""
         try:
             # Try unofficial API first
-            response = requests.get(f"{self.unofficial_api_url}/top-ten/top-gainer?all=true")
+            response = self.session.get(f"{self.unofficial_api_url}/top-ten/top-gainer?all=true")
             if response.status_code == 200:
-                data = response.json()
+                data = json_loads(response.content)
                 return data[:limit] if isinstance(data, list) else []
         except Exception as e:
             print(f"Error fetching top gainers from unofficial API: {str(e)}")
         
-        # If unofficial API fails, calculate from all stocks
+        # If unofficial API fails, calculate from all stocks. The cached
+        # frame gives the top-k pick directly, so only `limit` row dicts
+        # are ever materialized instead of the full list
         try:
-            all_stocks = self.get_all_stocks()
-            sorted_stocks = sorted(all_stocks, key=lambda x: x.get('changePercent', 0), reverse=True)
-            return sorted_stocks[:limit]
+            stocks = self._cached('all_stocks', self._fetch_all_stocks)
+            if isinstance(stocks, pd.DataFrame):
+                if 'changePercent' not in stocks.columns:
+                    return []
+                return stocks.nlargest(limit, 'changePercent').to_dict('records')
+            return heapq.nlargest(limit, stocks,
+                                  key=lambda x: x.get('changePercent') or 0)
         except Exception as e:
             print(f"Error calculating top gainers: {str(e)}")
             return []
     
-    def get_top_losers(self, limit=10):
+    def _fetch_top_losers(self, limit=10):
         """Get top losing stocks"""
         try:
             # Try unofficial API first
-            response = requests.get(f"{self.unofficial_api_url}/top-ten/top-loser?all=true")
+            response = self.session.get(f"{self.unofficial_api_url}/top-ten/top-loser?all=true")
             if response.status_code == 200:
-                data = response.json()
+                data = json_loads(response.content)
                 return data[:limit] if isinstance(data, list) else []
         except Exception as e:
             print(f"Error fetching top losers from unofficial API: {str(e)}")
         
         # If unofficial API fails, calculate from all stocks
         try:
-            all_stocks = self.get_all_stocks()
-            sorted_stocks = sorted(all_stocks, key=lambda x: x.get('changePercent', 0))
-            return sorted_stocks[:limit]
+            stocks = self._cached('all_stocks', self._fetch_all_stocks)
+            if isinstance(stocks, pd.DataFrame):
+                if 'changePercent' not in stocks.columns:
+                    return []
+                return stocks.nsmallest(limit, 'changePercent').to_dict('records')
+            return heapq.nsmallest(limit, stocks,
+                                   key=lambda x: x.get('changePercent') or 0)
         except Exception as e:
             print(f"Error calculating top losers: {str(e)}")
             return []
     
-    def get_sector_data(self):
+    def _fetch_sector_data(self):
         """Get sector-wise data"""
         try:
             # Try unofficial API first
-            response = requests.get(f"{self.unofficial_api_url}/sectorwise")
+            response = self.session.get(f"{self.unofficial_api_url}/sectorwise")
             if response.status_code == 200:
-                data = response.json()
+                data = json_loads(response.content)
                 return data
         except Exception as e:
             print(f"Error fetching sector data from unofficial API: {str(e)}")
         
-        # If unofficial API fails, calculate from all stocks
+        # If unofficial API fails, calculate from all stocks. A
+        # defaultdict keeps the accumulation loop branchless; at NEPSE
+        # scale (~250 rows) this beats paying DataFrame construction.
         try:
             all_stocks = self.get_all_stocks()
-            sectors = {}
-            
+            sectors = defaultdict(lambda: {'turnover': 0, 'volume': 0, 'count': 0})
+
             for stock in all_stocks:
-                sector = stock.get('sector', 'Unknown')
-                if sector not in sectors:
-                    sectors[sector] = {
-                        'name': sector,
-                        'turnover': 0,
-                        'volume': 0,
-                        'count': 0
-                    }
-                
-                sectors[sector]['turnover'] += stock.get('turnover', 0)
-                sectors[sector]['volume'] += stock.get('volume', 0)
-                sectors[sector]['count'] += 1
-            
-            return list(sectors.values())
+                entry = sectors[stock.get('sector') or 'Unknown']
+                entry['turnover'] += stock.get('turnover') or 0
+                entry['volume'] += stock.get('volume') or 0
+                entry['count'] += 1
+
+            return [{'name': name, **entry} for name, entry in sectors.items()]
         except Exception as e:
             print(f"Error calculating sector data: {str(e)}")
             return []
     
-    def get_stock(self, symbol):
-        """Get specific stock data"""
-        try:
-            # Try unofficial API first
-            response = requests.get(f"{self.unofficial_api_url}/security/{symbol}")
-            if response.status_code == 200:
-                data = response.json()
-                return data
-        except Exception as e:
-            print(f"Error fetching stock {symbol} from unofficial API: {str(e)}")
-        
-        # Fallback to official API
-        try:
-            response = requests.get(f"{self.nepse_base_url}/nots/security/{symbol}", headers=self.headers)
-            if response.status_code == 200:
-                data = response.json()
-                return self._parse_stock_data([data])[0] if data else None
-        except Exception as e:
-            print(f"Error fetching stock {symbol} from official API: {str(e)}")
-            
-            # Try to find in all stocks
-            all_stocks = self.get_all_stocks()
-            for stock in all_stocks:
-                if stock.get('symbol') == symbol:
-                    return stock
-            
+    def _fetch_stock(self, symbol):
+        """Get specific stock data, racing the unofficial and official APIs"""
+        stock = self._race_endpoints(
+            lambda: self._get_json(f"{self.unofficial_api_url}/security/{symbol}"),
+            lambda: self._official_stock(symbol),
+        )
+        if stock:
+            return stock
+
+        # Last resort: look the symbol up in the full stock list
+        for stock in self.get_all_stocks():
+            if stock.get('symbol') == symbol:
+                return stock
+
+        return None
+
+    def _official_stock(self, symbol):
+        """Fetch and normalize one security from the official API"""
+        data = self._get_json(f"{self.nepse_base_url}/nots/security/{symbol}")
+        if not data:
             return None
+        rows = self._parse_stock_data([data]).to_dict('records')
+        return rows[0] if rows else None
     
-    def get_historical_data(self, symbol, days=30):
+    def _fetch_historical_data(self, symbol, days=30):
         """Get historical data for a stock"""
         try:
             # Calculate date range
@@ -191,7 +436,7 @@ class NepseService:
             end_date_str = end_date.strftime('%Y-%m-%d')
             
             # Try unofficial API first
-            response = requests.get(
+            response = self.session.get(
                 f"{self.unofficial_api_url}/market/history/security/{symbol}",
                 params={
                     'startDate': start_date_str,
@@ -201,81 +446,79 @@ class NepseService:
             )
             
             if response.status_code == 200:
-                data = response.json()
+                data = json_loads(response.content)
                 return self._format_historical_data(data)
         except Exception as e:
             print(f"Error fetching historical data for {symbol} from unofficial API: {str(e)}")
         
         # Fallback to official API
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.nepse_base_url}/nots/historical/{symbol}",
                 params={
                     'startDate': start_date_str,
                     'endDate': end_date_str
-                },
-                headers=self.headers
+                }
             )
             
             if response.status_code == 200:
-                data = response.json()
+                data = json_loads(response.content)
                 return self._format_historical_data(data)
         except Exception as e:
             print(f"Error fetching historical data for {symbol} from official API: {str(e)}")
             return []
     
-    def get_market_depth(self, symbol):
-        """Get market depth (order book) for a stock"""
-        try:
-            # Try unofficial API first
-            response = requests.get(f"{self.unofficial_api_url}/market-depth/{symbol}")
-            if response.status_code == 200:
-                data = response.json()
-                return data
-        except Exception as e:
-            print(f"Error fetching market depth for {symbol} from unofficial API: {str(e)}")
-        
-        # Fallback to official API
-        try:
-            response = requests.get(f"{self.nepse_base_url}/nots/market-depth/{symbol}", headers=self.headers)
-            if response.status_code == 200:
-                data = response.json()
-                return self._parse_market_depth(data)
-        except Exception as e:
-            print(f"Error fetching market depth for {symbol} from official API: {str(e)}")
-            return {'bids': [], 'asks': []}
+    def _fetch_market_depth(self, symbol):
+        """Get market depth (order book), racing the unofficial and official APIs"""
+        depth = self._race_endpoints(
+            lambda: self._get_json(f"{self.unofficial_api_url}/market-depth/{symbol}"),
+            lambda: self._parse_market_depth(
+                self._get_json(f"{self.nepse_base_url}/nots/market-depth/{symbol}")),
+        )
+        return depth if depth else {'bids': [], 'asks': []}
     
-    def get_floorsheet(self, date=None):
-        """Get floorsheet data"""
-        try:
-            # Format date if provided
-            date_str = date if date else datetime.now().strftime('%Y-%m-%d')
-            
-            # Try unofficial API first
-            response = requests.get(f"{self.unofficial_api_url}/nepse-data/floorsheet", params={'page': 0, 'size': 500})
-            if response.status_code == 200:
-                data = response.json()
-                return data.get('content', [])
-        except Exception as e:
-            print(f"Error fetching floorsheet from unofficial API: {str(e)}")
-        
-        # Fallback to official API
-        try:
-            response = requests.get(f"{self.nepse_base_url}/nots/floorsheet/{date_str}", headers=self.headers)
-            if response.status_code == 200:
-                data = response.json()
-                return self._parse_floorsheet(data)
-        except Exception as e:
-            print(f"Error fetching floorsheet from official API: {str(e)}")
-            return []
+    def _fetch_floorsheet(self, date=None):
+        """Get floorsheet data, racing the unofficial and official APIs"""
+        date_str = date if date else datetime.now().strftime('%Y-%m-%d')
+
+        rows = self._race_endpoints(
+            self._unofficial_floorsheet,
+            lambda: self._parse_floorsheet(
+                self._get_json(f"{self.nepse_base_url}/nots/floorsheet/{date_str}")),
+        )
+        return rows if rows is not None else pd.DataFrame()
+
+    def _unofficial_floorsheet(self):
+        """Fetch the full unofficial floorsheet, paging concurrently.
+
+        The single page=0,size=500 call truncated busy days. Page 0
+        reveals the page count; the remaining pages then fan out over a
+        thread pool, so a full day costs roughly one extra round-trip
+        instead of one sequential round-trip per page.
+        """
+        url = f"{self.unofficial_api_url}/nepse-data/floorsheet"
+        first = self._get_json(url, params={'page': 0, 'size': 500})
+        rows = first.get('content', [])
+        total_pages = min(int(first.get('totalPages', 1) or 1), FLOORSHEET_MAX_PAGES)
+        if total_pages <= 1 or not rows:
+            return pd.DataFrame.from_records(rows)
+
+        def fetch_page(page):
+            return self._get_json(url, params={'page': page, 'size': 500}).get('content', [])
+
+        with ThreadPoolExecutor(max_workers=min(8, total_pages - 1)) as executor:
+            for page_rows in executor.map(fetch_page, range(1, total_pages)):
+                rows.extend(page_rows)
+
+        return pd.DataFrame.from_records(rows)
     
-    def get_market_status(self):
+    def _fetch_market_status(self):
         """Check if market is open"""
         try:
             # Try unofficial API first
-            response = requests.get(f"{self.unofficial_api_url}/nepse-data/market-open")
+            response = self.session.get(f"{self.unofficial_api_url}/nepse-data/market-open")
             if response.status_code == 200:
-                data = response.json()
+                data = json_loads(response.content)
                 return {
                     'isOpen': data.get('isOpen', False),
                     'message': data.get('message', '')
@@ -285,162 +528,163 @@ class NepseService:
         
         # Fallback to official API
         try:
-            response = requests.get(f"{self.nepse_base_url}/nots/market-status", headers=self.headers)
+            response = self.session.get(f"{self.nepse_base_url}/nots/market-status")
             if response.status_code == 200:
-                data = response.json()
+                data = json_loads(response.content)
                 return data
         except Exception as e:
             print(f"Error fetching market status from official API: {str(e)}")
         
         # Fallback to time-based calculation
-        now = datetime.now()
-        nepal_offset = timedelta(hours=5, minutes=45)
-        nepal_time = datetime.utcnow() + nepal_offset
-        hours = nepal_time.hour
-        minutes = nepal_time.minute
-        current_time = hours * 60 + minutes
-        
-        # NEPSE trading hours: 11:00 AM to 3:00 PM (Sunday to Thursday)
-        market_open = 11 * 60  # 11:00 AM
-        market_close = 15 * 60  # 3:00 PM
-        day_of_week = nepal_time.weekday()
-        
-        # In Nepal, Sunday is the first day of the week (0 = Sunday, 6 = Saturday)
-        is_weekday = day_of_week in [0, 1, 2, 3, 4]  # Sunday to Thursday
-        is_during_trading_hours = current_time >= market_open and current_time < market_close
-        
+        is_open = is_market_open()
         return {
-            'isOpen': is_weekday and is_during_trading_hours,
-            'message': 'Market is open' if (is_weekday and is_during_trading_hours) else 'Market is closed'
+            'isOpen': is_open,
+            'message': 'Market is open' if is_open else 'Market is closed'
         }
     
     def _parse_stock_data(self, data):
-        """Parse stock data from API response"""
-        stocks = []
-        
-        for item in data:
-            stock = {
-                'symbol': item.get('symbol', '') or item.get('securityName', ''),
-                'name': item.get('securityName', '') or item.get('companyName', ''),
-                'ltp': float(item.get('lastTradedPrice', 0) or item.get('ltp', 0) or 0),
-                'change': float(item.get('change', 0) or 0),
-                'changePercent': float(item.get('percentageChange', 0) or 0),
-                'volume': int(item.get('totalTradeQuantity', 0) or item.get('volume', 0) or 0),
-                'high': float(item.get('highPrice', 0) or item.get('high', 0) or 0),
-                'low': float(item.get('lowPrice', 0) or item.get('low', 0) or 0),
-                'open': float(item.get('openPrice', 0) or item.get('open', 0) or 0),
-                'previousClose': float(item.get('previousClose', 0) or 0),
-                'turnover': float(item.get('turnover', 0) or 0),
-                'totalTrades': int(item.get('totalTrades', 0) or 0),
-                'sector': item.get('sector', 'Unknown')
-            }
-            
-            # Calculate market cap if available
-            if 'listedShares' in item and item.get('listedShares'):
-                stock['marketCap'] = stock['ltp'] * float(item.get('listedShares', 0))
-            
-            stocks.append(stock)
-        
-        return stocks
+        """Parse stock data from API response.
+
+        One vectorized pass over all rows: coalescing the alternate
+        source keys and the numeric casts run in C instead of ~12
+        Python-level .get calls per record. Returns a DataFrame; per-row
+        dicts are only built at the API edge (see _records_at_edge).
+        """
+        if not data:
+            return pd.DataFrame()
+
+        df = pd.DataFrame.from_records(data)
+        out = pd.DataFrame({
+            'symbol': _coalesce_columns(df, ('symbol', 'securityName'), ''),
+            'name': _coalesce_columns(df, ('securityName', 'companyName'), ''),
+            'ltp': _numeric_columns(df, ('lastTradedPrice', 'ltp')),
+            'change': _numeric_columns(df, ('change',)),
+            'changePercent': _numeric_columns(df, ('percentageChange',)),
+            'volume': _numeric_columns(df, ('totalTradeQuantity', 'volume'), int),
+            'high': _numeric_columns(df, ('highPrice', 'high')),
+            'low': _numeric_columns(df, ('lowPrice', 'low')),
+            'open': _numeric_columns(df, ('openPrice', 'open')),
+            'previousClose': _numeric_columns(df, ('previousClose',)),
+            'turnover': _numeric_columns(df, ('turnover',)),
+            'totalTrades': _numeric_columns(df, ('totalTrades',), int),
+            'sector': _coalesce_columns(df, ('sector',), 'Unknown'),
+        })
+
+        # Market cap as a single vectorized multiply when shares are known
+        if 'listedShares' in df.columns:
+            shares = pd.to_numeric(df['listedShares'], errors='coerce').fillna(0)
+            out['marketCap'] = out['ltp'] * shares
+
+        return out
     
     def _parse_index_data(self, data):
         """Parse index data from API response"""
-        indices = []
-        
-        for item in data:
-            index = {
-                'name': item.get('indexName', '') or item.get('name', ''),
-                'value': float(item.get('indexValue', 0) or item.get('value', 0) or 0),
-                'change': float(item.get('change', 0) or 0),
-                'changePercent': float(item.get('percentageChange', 0) or 0),
-                'high': float(item.get('high', 0) or 0),
-                'low': float(item.get('low', 0) or 0),
-                'turnover': float(item.get('turnover', 0) or 0)
-            }
-            
-            indices.append(index)
-        
-        return indices
-    
+        return list(map(_unpack_index, data))
+
     def _parse_market_depth(self, data):
         """Parse market depth data from API response"""
-        market_depth = {
-            'bids': [],
-            'asks': []
+        return {
+            'bids': list(map(_unpack_depth_order, data.get('buyOrders', ()))),
+            'asks': list(map(_unpack_depth_order, data.get('sellOrders', ()))),
         }
-        
-        if 'buyOrders' in data:
-            for item in data['buyOrders']:
-                market_depth['bids'].append({
-                    'price': float(item.get('price', 0) or 0),
-                    'quantity': int(item.get('quantity', 0) or 0),
-                    'orders': int(item.get('orders', 0) or 1)
-                })
-        
-        if 'sellOrders' in data:
-            for item in data['sellOrders']:
-                market_depth['asks'].append({
-                    'price': float(item.get('price', 0) or 0),
-                    'quantity': int(item.get('quantity', 0) or 0),
-                    'orders': int(item.get('orders', 0) or 1)
-                })
-        
-        return market_depth
     
     def _parse_floorsheet(self, data):
-        """Parse floorsheet data from API response"""
-        floorsheet = []
-        
-        for item in data:
-            floorsheet.append({
-                'contractNo': item.get('contractNo', '') or item.get('contractId', ''),
-                'symbol': item.get('symbol', '') or item.get('stockSymbol', ''),
-                'buyerMemberId': item.get('buyerMemberId', '') or item.get('buyerBroker', ''),
-                'sellerMemberId': item.get('sellerMemberId', '') or item.get('sellerBroker', ''),
-                'quantity': int(item.get('quantity', 0) or 0),
-                'rate': float(item.get('rate', 0) or 0),
-                'amount': float(item.get('amount', 0) or 0),
-                'time': item.get('tradeTime', '') or item.get('time', '')
-            })
-        
-        return floorsheet
+        """Parse floorsheet data into a columnar DataFrame in one pass"""
+        if not data:
+            return pd.DataFrame()
+
+        df = pd.DataFrame.from_records(data)
+        out = pd.DataFrame({
+            'contractNo': _coalesce_columns(df, ('contractNo', 'contractId'), ''),
+            'symbol': _coalesce_columns(df, ('symbol', 'stockSymbol'), ''),
+            'buyerMemberId': _coalesce_columns(df, ('buyerMemberId', 'buyerBroker'), ''),
+            'sellerMemberId': _coalesce_columns(df, ('sellerMemberId', 'sellerBroker'), ''),
+            'quantity': _numeric_columns(df, ('quantity',), int),
+            'rate': _numeric_columns(df, ('rate',)),
+            'amount': _numeric_columns(df, ('amount',)),
+            'time': _coalesce_columns(df, ('tradeTime', 'time'), ''),
+        })
+        return out
     
     def _format_historical_data(self, data):
-        """Format historical data for charting"""
-        historical = []
-        
-        for item in data:
-            historical.append({
-                'date': item.get('businessDate', '') or item.get('date', ''),
-                'open': float(item.get('openPrice', 0) or item.get('open', 0) or 0),
-                'high': float(item.get('highPrice', 0) or item.get('high', 0) or 0),
-                'low': float(item.get('lowPrice', 0) or item.get('low', 0) or 0),
-                'close': float(item.get('lastTradedPrice', 0) or item.get('close', 0) or 0),
-                'volume': int(item.get('totalTradeQuantity', 0) or item.get('volume', 0) or 0),
-                'turnover': float(item.get('turnover', 0) or 0)
-            })
-        
+        """Format historical data into a columnar DataFrame for charting"""
+        if not data:
+            return pd.DataFrame()
+
+        df = pd.DataFrame.from_records(data)
+        out = pd.DataFrame({
+            'date': _coalesce_columns(df, ('businessDate', 'date'), ''),
+            'open': _numeric_columns(df, ('openPrice', 'open')),
+            'high': _numeric_columns(df, ('highPrice', 'high')),
+            'low': _numeric_columns(df, ('lowPrice', 'low')),
+            'close': _numeric_columns(df, ('lastTradedPrice', 'close')),
+            'volume': _numeric_columns(df, ('totalTradeQuantity', 'volume'), int),
+            'turnover': _numeric_columns(df, ('turnover',)),
+        })
+
         # Sort by date (newest first)
-        historical.sort(key=lambda x: x['date'], reverse=True)
-        
-        return historical
+        return out.sort_values('date', ascending=False)
     
     def _scrape_stock_data_from_website(self):
         """Scrape stock data directly from NEPSE website as last resort"""
         try:
             # Fetch the today's price page
-            response = requests.get('https://nepalstock.com/today-price', headers=self.headers)
-            soup = BeautifulSoup(response.text, 'lxml')
-            
+            response = self.session.get('https://nepalstock.com/today-price')
+
+            # Fast path: read_html parses the table straight into a
+            # numeric DataFrame in C (lxml), including the thousands
+            # separators, instead of walking cells in Python
+            try:
+                return self._parse_today_price_table(response.text)
+            except Exception as e:
+                print(f"Error parsing today-price table with read_html: {str(e)}")
+
+            return self._scrape_today_price_with_bs4(response.text)
+        except Exception as e:
+            print(f"Error scraping website: {str(e)}")
+            return []
+
+    def _parse_today_price_table(self, html):
+        """Parse the today-price table with pandas.read_html"""
+        tables = pd.read_html(StringIO(html), attrs={'class': 'table-bordered'},
+                              flavor='lxml', header=0, thousands=',')
+        if not tables or tables[0].shape[1] < 12:
+            return pd.DataFrame()
+
+        df = tables[0].iloc[:, :12].copy()
+        df.columns = ['sn', 'symbol', 'name', 'high', 'low', 'open', 'ltp',
+                      'change', 'changePercent', 'volume', 'turnover', 'totalTrades']
+
+        percent = df['changePercent'].astype(str).str.replace('%', '', regex=False)
+        df['changePercent'] = pd.to_numeric(percent, errors='coerce').fillna(0)
+        for column in ('high', 'low', 'open', 'ltp', 'change', 'turnover'):
+            df[column] = pd.to_numeric(df[column], errors='coerce').fillna(0).astype(float)
+        for column in ('volume', 'totalTrades'):
+            df[column] = pd.to_numeric(df[column], errors='coerce').fillna(0).astype(int)
+
+        df['previousClose'] = df['ltp'] - df['change']
+        df['sector'] = 'Unknown'
+
+        return df.drop(columns='sn')
+
+    def _scrape_today_price_with_bs4(self, html):
+        """Row-by-row BeautifulSoup fallback for the today-price table"""
+        try:
+            # Deferred import: this last-resort path is the only bs4 user,
+            # so the normal JSON paths never pay its import cost
+            from bs4 import BeautifulSoup
+
+            soup = BeautifulSoup(html, 'lxml')
+
             # Find the table with stock data
             table = soup.find('table', class_='table-bordered')
             if not table:
                 return []
-            
+
             # Parse table data
             stocks = []
             rows = table.find_all('tr')[1:]  # Skip header row
-            
+
             for row in rows:
                 cols = row.find_all('td')
                 if len(cols) >= 10:
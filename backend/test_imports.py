@@ -5,61 +5,41 @@ Test script to verify that all modules can be imported correctly.
 This helps identify any import or dependency issues before running the full application.
 """
 
+import importlib
 import sys
 import os
 
+# Module names to import, grouped for reporting
+STDLIB_MODULES = ['json', 'datetime', 'time', 'logging']
+THIRD_PARTY_MODULES = [
+    'flask', 'flask_cors', 'flask_caching', 'flask_limiter', 'requests',
+    'bs4', 'pandas', 'numpy', 'dotenv', 'apscheduler'
+]
+LOCAL_MODULES = ['services.nepse_service', 'services.merolagani_service', 'utils', 'health']
+
+def import_all(label, modules):
+    """Import every named module, reporting each failure; True if all pass"""
+    ok = True
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            print(f"✗ {name} import failed: {e}")
+            ok = False
+    if ok:
+        print(f"✓ {label} imports successful")
+    return ok
+
 print(f"Python version: {sys.version}")
 print(f"Current directory: {os.getcwd()}")
 
-try:
-    print("\nTesting imports...")
-    
-    # Test standard library imports
-    import json
-    import datetime
-    import time
-    import logging
-    print("✓ Standard library imports successful")
-    
-    # Test third-party imports (these would fail if dependencies aren't installed)
-    import flask
-    import flask_cors
-    import requests
-    import bs4
-    import pandas
-    import dotenv
-    import apscheduler
-    print("✓ Third-party library imports successful")
-    
-    # Test local module imports
-    # These will fail if the file structure is incorrect
-    try:
-        from services.nepse_service import NepseService
-        print("✓ NepseService import successful")
-    except ImportError as e:
-        print(f"✗ NepseService import failed: {e}")
-    
-    try:
-        from services.merolagani_service import MerolaganiService
-        print("✓ MerolaganiService import successful")
-    except ImportError as e:
-        print(f"✗ MerolaganiService import failed: {e}")
-    
-    try:
-        from utils import get_nepal_time
-        print("✓ utils import successful")
-    except ImportError as e:
-        print(f"✗ utils import failed: {e}")
-    
-    try:
-        from health import health_bp
-        print("✓ health_bp import successful")
-    except ImportError as e:
-        print(f"✗ health_bp import failed: {e}")
-    
-    print("\nImport tests completed")
-    
-except ImportError as e:
-    print(f"\n✗ Import error: {e}")
+print("\nTesting imports...")
+stdlib_ok = import_all("Standard library", STDLIB_MODULES)
+third_party_ok = import_all("Third-party library", THIRD_PARTY_MODULES)
+local_ok = import_all("Local module", LOCAL_MODULES)
+
+print("\nImport tests completed")
+
+if not (stdlib_ok and third_party_ok):
     print("\nPlease install required dependencies with: pip install -r requirements.txt")
-    sys.exit(1)
\ No newline at end of file
+    sys.exit(1)
@@ -1,63 +1,121 @@
 import os
 import json
+import re
+import time
 from datetime import datetime, timedelta
+from types import MappingProxyType
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Load environment variables
 load_dotenv()
 
+def json_dumps(obj):
+    """Serialize to JSON bytes, using orjson's C encoder when available"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+def json_loads(payload):
+    """Parse JSON from bytes or str, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+# Shared session so upstream calls reuse pooled keep-alive connections
+# instead of paying TCP/TLS setup on every request. Transient upstream
+# gateway errors are retried with backoff at the adapter level so
+# callers of safe_request don't surface one-off 502/503/504s
+_retry = Retry(total=3, backoff_factor=0.3,
+               status_forcelist=[502, 503, 504],
+               allowed_methods=['GET', 'POST'])
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=_retry)
+_session.mount('https://', _adapter)
+_session.mount('http://', _adapter)
+
+def get_session():
+    """Get the shared requests session with connection pooling"""
+    return _session
+
+# Nepal timezone offset (UTC+5:45), built once instead of per call
+NEPAL_OFFSET = timedelta(hours=5, minutes=45)
+
+# NEPSE trading window in minutes from midnight (11:00 AM - 3:00 PM), and
+# the trading days as native Python weekday numbers (Mon=0 .. Sun=6;
+# NEPSE trades Sunday through Thursday)
+MARKET_OPEN_MIN = 11 * 60
+MARKET_CLOSE_MIN = 15 * 60
+TRADING_WEEKDAYS = frozenset({6, 0, 1, 2, 3})
+
 def get_nepal_time():
     """Get current time in Nepal timezone (UTC+5:45)"""
-    utc_now = datetime.utcnow()
-    nepal_offset = timedelta(hours=5, minutes=45)
-    nepal_time = utc_now + nepal_offset
-    return nepal_time
+    return datetime.utcnow() + NEPAL_OFFSET
+
+# format_nepal_time is called on every API response for the timestamp
+# field; memoize the default format per whole second so repeated calls
+# within the same second skip both datetime math and formatting
+_fmt_cache_sec = None
+_fmt_cache_str = None
 
 def format_nepal_time(format_str='%Y-%m-%d %H:%M:%S'):
     """Get formatted Nepal time string"""
+    global _fmt_cache_sec, _fmt_cache_str
+    if format_str == '%Y-%m-%d %H:%M:%S':
+        now = int(time.time())
+        if now != _fmt_cache_sec:
+            t = get_nepal_time()
+            # f-string interpolation is noticeably cheaper than strftime's
+            # format-string parsing for this fixed layout
+            _fmt_cache_str = (f"{t.year:04d}-{t.month:02d}-{t.day:02d} "
+                              f"{t.hour:02d}:{t.minute:02d}:{t.second:02d}")
+            _fmt_cache_sec = now
+        return _fmt_cache_str
     return get_nepal_time().strftime(format_str)
 
+# Browser headers are fixed for the process lifetime (the env is read
+# once at import, after load_dotenv), so build the dict once and share
+# it read-only across threads instead of allocating it per request
+_BROWSER_HEADERS = MappingProxyType({
+    'User-Agent': os.getenv('USER_AGENT', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'),
+    'Accept': 'application/json, text/plain, */*',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Origin': 'https://nepalstock.com',
+    'Referer': 'https://nepalstock.com/'
+})
+
 def get_browser_headers():
     """Get headers to mimic browser request"""
-    return {
-        'User-Agent': os.getenv('USER_AGENT', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'),
-        'Accept': 'application/json, text/plain, */*',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Origin': 'https://nepalstock.com',
-        'Referer': 'https://nepalstock.com/'
-    }
+    return _BROWSER_HEADERS
 
 def is_market_open():
     """Check if Nepal Stock Exchange is currently open"""
     nepal_time = get_nepal_time()
-    hours = nepal_time.hour
-    minutes = nepal_time.minute
-    current_time = hours * 60 + minutes
-    
-    # NEPSE trading hours: 11:00 AM to 3:00 PM (Sunday to Thursday)
-    market_open = 11 * 60  # 11:00 AM
-    market_close = 15 * 60  # 3:00 PM
-    day_of_week = nepal_time.weekday()
-    
-    # In Nepal, Sunday is the first day of the week (0 = Sunday, 6 = Saturday)
-    # Python's weekday() returns 0 for Monday, so we need to adjust
-    nepal_day = (day_of_week + 1) % 7  # Convert to Nepal's week (0 = Sunday)
-    
-    is_weekday = nepal_day in [0, 1, 2, 3, 4]  # Sunday to Thursday
-    is_during_trading_hours = current_time >= market_open and current_time < market_close
-    
-    return is_weekday and is_during_trading_hours
+    current_minute = nepal_time.hour * 60 + nepal_time.minute
+    return (nepal_time.weekday() in TRADING_WEEKDAYS
+            and MARKET_OPEN_MIN <= current_minute < MARKET_CLOSE_MIN)
+
+# Strips everything except digits, decimal point and minus sign
+_NUM_RE = re.compile(r'[^0-9.\-]+')
 
 def parse_number(text):
     """Parse number from text, handling commas and other formatting"""
     try:
-        if not text or text.strip() == '':
+        if not text:
             return 0
-            
-        # Remove commas and other non-numeric characters except decimal point and minus sign
-        clean_text = ''.join(c for c in text if c.isdigit() or c in ['.', '-'])
-        
+
+        # Remove commas and other non-numeric characters except decimal
+        # point and minus sign; the regex engine does this in C instead
+        # of a per-character Python loop
+        clean_text = _NUM_RE.sub('', text)
+
         # Convert to float or int
         if '.' in clean_text:
             return float(clean_text)
@@ -75,9 +133,9 @@ def safe_request(url, method='get', params=None, data=None, headers=None, timeou
             headers = get_browser_headers()
             
         if method.lower() == 'get':
-            response = requests.get(url, params=params, headers=headers, timeout=timeout)
+            response = _session.get(url, params=params, headers=headers, timeout=timeout)
         elif method.lower() == 'post':
-            response = requests.post(url, params=params, json=data, headers=headers, timeout=timeout)
+            response = _session.post(url, params=params, json=data, headers=headers, timeout=timeout)
         else:
             raise ValueError(f"Unsupported HTTP method: {method}")
             